@@ -0,0 +1,211 @@
+import os
+import json
+import time
+import threading
+import logging
+from datetime import datetime, timezone
+from spotipy.exceptions import SpotifyException
+import config
+
+log = logging.getLogger(__name__)
+
+class ArtistCache:
+    """
+    Persistent per-artist discography cache, keyed by artist ID.
+
+    For every artist it remembers the newest album seen so far, the size of the
+    album list, its recent release dates, when it was last checked and any
+    validators (ETag / Last-Modified) returned by the API, so
+    artists without new albums can be skipped with a conditional request or a cheap
+    comparison instead of re-processing their albums every day.
+
+    The file is JSON with one artist per line and sorted keys, so committing it next
+    to the release files produces small diffs.
+    """
+
+    def __init__(self, path=None, max_entries=None):
+        self.path = path or config.ARTIST_CACHE_FILE
+        self.max_entries = max_entries or config.ARTIST_CACHE_MAX_ENTRIES
+        self._entries = {}
+        self._previous = {}  # entries replaced by record() since the last save, for revert()
+        self._lock = threading.Lock()
+        self.not_modified = 0
+        self.unchanged = 0
+        self.changed = 0
+
+    def load(self):
+        """Load the cache from disk (missing or corrupt files start an empty cache)."""
+        try:
+            with open(self.path, 'r') as f:
+                self._entries = json.load(f)
+            log.info(f"🗂️ Loaded discography cache for {len(self._entries)} artists")
+        except FileNotFoundError:
+            log.info(f"🗂️ {self.path} not found (first run), starting empty cache")
+            self._entries = {}
+        except ValueError as e:
+            log.warning(f"⚠️ Could not parse {self.path} ({e}), starting empty cache")
+            self._entries = {}
+        return self
+
+    def save(self, path=None, artist_ids=None):
+        """
+        Write the cache atomically (temp file + rename).
+        With `artist_ids`, only those artists are written (used for per-shard partial caches).
+        """
+        path = path or self.path
+        with self._lock:
+            self._previous.clear()
+            entries = self._entries
+            if artist_ids is not None:
+                entries = {a: entries[a] for a in artist_ids if a in entries}
+            lines = [
+                f"{json.dumps(artist_id)}: {json.dumps(entry, sort_keys=True)}"
+                for artist_id, entry in sorted(entries.items())
+            ]
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write("{\n" + ",\n".join(lines) + "\n}\n")
+        os.replace(tmp_path, path)
+
+    def merge_file(self, path):
+        """Merge entries from another cache file (e.g. a shard's partial cache) into this one."""
+        with open(path, 'r') as f:
+            entries = json.load(f)
+        with self._lock:
+            self._entries.update(entries)
+        return len(entries)
+
+    def get(self, artist_id):
+        with self._lock:
+            return self._entries.get(artist_id)
+
+    def touch(self, artist_id):
+        """Record that an artist was checked and found unchanged (HTTP 304)."""
+        with self._lock:
+            entry = self._entries.get(artist_id)
+            if entry is not None:
+                entry['checked_at'] = int(time.time())
+            self.not_modified += 1
+
+    def record(self, artist_id, page, etag=None, last_modified=None, now=None):
+        """
+        Store what we saw for an artist's album page.
+
+        Returns True if the page is unchanged since the previous run (same album
+        count and same newest album), meaning its albums need no processing.
+
+        Albums dated after `now` (listed early for markets ahead of UTC) are left out of
+        that state, and the page's validators are not kept, so the album counts as a
+        change on the run where its release date is reached.
+        """
+        today = (now or datetime.now(timezone.utc)).strftime('%Y-%m-%d')
+        # Release dates of any precision ('2024', '2024-05') compare correctly as string prefixes
+        released = [a for a in page['items'] if a['release_date'] <= today]
+        upcoming = len(page['items']) - len(released)
+        newest = max(released, key=lambda a: a['release_date'], default=None)
+        entry = {
+            'newest_album_id': newest['id'] if newest else None,
+            'newest_release_date': newest['release_date'] if newest else None,
+            'total': page.get('total', len(page['items'])) - upcoming,
+            # Release history used by release_scheduler to decide how often to poll
+            'release_dates': sorted({a['release_date'] for a in released}, reverse=True)[:10],
+            'etag': None if upcoming else etag,
+            'last_modified': None if upcoming else last_modified,
+            'checked_at': int(time.time()),
+        }
+
+        with self._lock:
+            previous = self._entries.get(artist_id)
+            self._entries[artist_id] = entry
+            self._previous.setdefault(artist_id, previous)
+
+            unchanged = (
+                previous is not None
+                and previous.get('total') == entry['total']
+                and previous.get('newest_album_id') == entry['newest_album_id']
+            )
+            if unchanged:
+                self.unchanged += 1
+            else:
+                self.changed += 1
+            return unchanged
+
+    def revert(self, artist_id):
+        """
+        Put back the entry an artist had before record(), e.g. when its new albums could
+        not be fetched, so the next run sees the page as changed and processes them again.
+        """
+        with self._lock:
+            if artist_id not in self._previous:
+                return
+            previous = self._previous.pop(artist_id)
+            if previous is None:
+                self._entries.pop(artist_id, None)
+            else:
+                self._entries[artist_id] = previous
+
+    def prune(self, artist_ids):
+        """
+        Evict artists no longer in artists_id.txt, then the least recently checked
+        artists until the cache fits in max_entries.
+        """
+        active = set(artist_ids)
+        with self._lock:
+            removed = [a for a in self._entries if a not in active]
+            for artist_id in removed:
+                del self._entries[artist_id]
+
+            overflow = len(self._entries) - self.max_entries
+            if overflow > 0:
+                oldest = sorted(self._entries, key=lambda a: self._entries[a].get('checked_at', 0))
+                for artist_id in oldest[:overflow]:
+                    del self._entries[artist_id]
+                removed.extend(oldest[:overflow])
+
+        if removed:
+            log.info(f"🧹 Evicted {len(removed)} artists from the discography cache")
+        return len(removed)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+def conditional_artist_albums(sp, artist_id, entry=None, limit=20):
+    """
+    GET an artist's album page with the validators stored in `entry`.
+
+    spotipy has no way to send conditional headers, so this goes through the
+    client's own session and auth headers. Errors are raised as SpotifyException
+    so safe_read_call handles 429s as usual.
+
+    Returns (page, etag, last_modified); page is None when the API answered
+    304 Not Modified.
+    """
+    headers = sp._auth_headers()
+    if entry and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry and entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+
+    response = sp._session.get(
+        f"{sp.prefix}artists/{artist_id}/albums",
+        params={'include_groups': 'album,single', 'limit': limit},
+        headers=headers,
+        proxies=sp.proxies,
+        timeout=sp.requests_timeout
+    )
+
+    if response.status_code == 304:
+        return None, entry.get('etag'), entry.get('last_modified')
+
+    if response.status_code >= 400:
+        raise SpotifyException(
+            response.status_code,
+            -1,
+            f"{response.url}:\n {response.text}",
+            headers=response.headers
+        )
+
+    return response.json(), response.headers.get('ETag'), response.headers.get('Last-Modified')
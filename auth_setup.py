@@ -1,18 +1,66 @@
 import os
-import time
 import spotipy
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from spotipy.oauth2 import SpotifyOAuth
 import logging
+import config
+from metrics import get_metrics
+from response_cache import CachingAdapter, get_response_cache
+from token_provider import TokenProvider, token_cache_path
 
 log = logging.getLogger(__name__)
 
+def build_session(pool_size=None):
+    """
+    Build a long-lived, pooled HTTP session for Spotify calls.
+
+    Keep-alive connections are reused across calls and threads (up to `pool_size`
+    per host). Connection errors and 5xx responses on idempotent requests are retried
+    here, at the transport level; 429s are not, so they reach safe_spotify_call and
+    the shared rate limiter. POSTs are never retried, so playlist adds are not duplicated.
+
+    Unless SPOTIFY_CACHE_MODE is off, responses go through the on-disk response cache
+    (see response_cache.py).
+    """
+    pool_size = pool_size or config.HTTP_POOL_SIZE
+    retry = Retry(
+        total=3,
+        connect=3,
+        read=3,
+        status=3,
+        backoff_factor=0.3,
+        status_forcelist=(500, 502, 503, 504)
+    )
+    cache = get_response_cache()
+    if cache is not None:
+        adapter = CachingAdapter(cache, pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    else:
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.hooks['response'].append(get_metrics().response_hook)
+    return session
+
 class SpotifyClientManager:
     """
-    Manages Spotify client with automatic token refresh for long-running processes.
-    Tokens are refreshed automatically before they expire (default Spotify tokens last 1 hour).
+    Manages the user-authorized Spotify client for long-running processes.
+
+    The access token is kept by a TokenProvider (see token_provider.py), which refreshes it
+    in the background before it expires and shares it with the other processes of a run.
+    The client reads the current token on every request, so a refresh never interrupts a
+    batch and needs no call to get_client().
+
+    The manager owns a single pooled HTTP session and a single Spotify client built on it,
+    so connections stay warm for the whole run and the client can be shared by concurrent workers.
     """
     
-    def __init__(self):
+    def __init__(self, pool_size=None):
+        self.session = build_session(pool_size)
+
         self.client_id = self._get_env_var("SPOTIFY_CLIENT_ID")
         self.client_secret = self._get_env_var("SPOTIFY_CLIENT_SECRET")
         self.refresh_token = self._get_env_var("SPOTIFY_REFRESH_TOKEN")
@@ -23,12 +71,16 @@ class SpotifyClientManager:
             redirect_uri="http://127.0.0.1:8888/callback",
             scope="playlist-modify-public playlist-modify-private user-library-read",
             cache_path=".spotify_cache",
-            show_dialog=False
+            show_dialog=False,
+            requests_session=self.session
         )
-        
-        self.token_info = None
-        self.token_refresh_time = 0
-        self._refresh_access_token()
+        self.sp_oauth.OAUTH_TOKEN_URL = config.SPOTIFY_TOKEN_URL
+
+        self.tokens = TokenProvider(
+            self._request_token, cache_path=token_cache_path(f"user-{self.client_id}", self.refresh_token), name='user'
+        ).start()
+        self.client = spotipy.Spotify(auth_manager=self.tokens, requests_session=self.session)
+        self.client.prefix = config.SPOTIFY_API_URL
     
     def _get_env_var(self, var_name):
         """Get environment variable or raise error if missing."""
@@ -37,42 +89,20 @@ class SpotifyClientManager:
             raise ValueError(f"Missing required environment variable: {var_name}")
         return value
     
-    def _refresh_access_token(self):
-        """Refresh the access token and update the client."""
+    def _request_token(self):
+        """Exchange the refresh token for a new access token (called by the TokenProvider)."""
         try:
-            self.token_info = self.sp_oauth.refresh_access_token(self.refresh_token)
-            self.token_refresh_time = time.time()
-            log.info("✅ Spotify access token refreshed successfully")
+            return self.sp_oauth.refresh_access_token(self.refresh_token)
         except Exception as e:
             log.error(f"❌ Failed to refresh access token: {e}")
             raise
     
-    def _check_token_expiry(self):
-        """Check if token needs refresh (refresh 5 minutes before expiry)."""
-        if not self.token_info:
-            return True
-        
-        # Spotify tokens typically expire after 3600 seconds (1 hour)
-        # Refresh 5 minutes (300 seconds) before expiry to be safe
-        expires_in = self.token_info.get('expires_in', 3600)
-        time_since_refresh = time.time() - self.token_refresh_time
-        
-        # Refresh if we're within 5 minutes of expiry
-        if time_since_refresh >= (expires_in - 300):
-            log.info(f"⏰ Token expiring soon (refreshed {int(time_since_refresh)}s ago), refreshing now...")
-            return True
-        
-        return False
-    
     def get_client(self):
         """
-        Get Spotify client, automatically refreshing token if needed.
-        Call this method each time before making Spotify API calls in long-running processes.
+        Get the Spotify client. Its token is kept fresh in the background, so the same
+        client can be held on to for the whole run.
         """
-        if self._check_token_expiry():
-            self._refresh_access_token()
-        
-        return spotipy.Spotify(auth=self.token_info['access_token'])
+        return self.client
 
 
 # Global instance for easy access
@@ -0,0 +1,458 @@
+"""
+Local stand-in for the parts of the Spotify Web API (and the Discord webhook) this project uses.
+
+Serves a synthetic, deterministic catalog of configurable size, with injectable latency
+and 429 responses, so the scanner can be benchmarked and regression-tested offline.
+Point the project at it with SPOTIFY_API_URL / SPOTIFY_TOKEN_URL / DISCORD_WEBHOOK_URL
+(see FakeSpotifyServer.env()).
+
+Run standalone:
+    python benchmarks/fake_spotify.py --artists 3300 --port 8765
+"""
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from datetime import date, datetime, timezone, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+ID_LENGTH = 22
+
+def make_id(kind, *numbers):
+    """Decodable base62 ID: a kind letter followed by zero-padded numbers."""
+    body = kind + ''.join(f"{n:09d}" if i == 0 else f"{n:04d}" for i, n in enumerate(numbers))
+    return body.ljust(ID_LENGTH, '0')
+
+def parse_id(value):
+    """Inverse of make_id: (kind, artist_index, album_index, track_index)."""
+    return value[0], int(value[1:10]), int(value[10:14] or 0), int(value[14:18] or 0)
+
+
+class SyntheticCatalog:
+    """
+    Deterministic catalog generated on demand, so 50,000 artists cost no upfront memory.
+
+    A `release_rate` fraction of artists has a release from today or yesterday, and a
+    `collab_rate` fraction of those releases is shared with the next artist, the way
+    collaborations show up under several artists on Spotify.
+    """
+
+    def __init__(self, artist_count=3300, seed=1, release_rate=0.03, collab_rate=0.3,
+                 albums_per_artist=(3, 30), tracks_per_album=(1, 14), playlist_size=2000, today=None):
+        self.artist_count = artist_count
+        self.seed = seed
+        self.release_rate = release_rate
+        self.collab_rate = collab_rate
+        self.albums_per_artist = albums_per_artist
+        self.tracks_per_album = tracks_per_album
+        self.playlist_size = playlist_size
+        self.today = today or datetime.now(timezone.utc).date()
+        self._new_releases = None
+
+    @property
+    def artist_ids(self):
+        return [make_id('R', i) for i in range(self.artist_count)]
+
+    def _rng(self, *key):
+        # String seeds are hashed with SHA-512, so this is stable across processes
+        return random.Random(':'.join(map(str, (self.seed,) + key)))
+
+    def _own_albums(self, artist_index):
+        rng = self._rng('albums', artist_index)
+        albums = []
+        has_release = rng.random() < self.release_rate
+        shared = has_release and rng.random() < self.collab_rate
+
+        for n in range(rng.randint(*self.albums_per_artist)):
+            days_ago = rng.randint(0, 1) if (n == 0 and has_release) else rng.randint(2, 3650)
+            artists = [artist_index]
+            if n == 0 and shared:
+                artists.append((artist_index + 1) % self.artist_count)
+            albums.append(self._album(artist_index, n, days_ago, artists, rng.randint(*self.tracks_per_album)))
+
+        return albums, shared
+
+    def _album(self, artist_index, n, days_ago, artist_indexes, track_count):
+        album_id = make_id('L', artist_index, n)
+        release_date = self.today - timedelta(days=days_ago)
+        return {
+            'id': album_id,
+            'name': f"Album {artist_index}-{n}",
+            'album_type': 'single' if track_count <= 3 else 'album',
+            'release_date': release_date.isoformat(),
+            'release_date_precision': 'day',
+            'total_tracks': track_count,
+            'uri': f"spotify:album:{album_id}",
+            'artists': [self.artist(i) for i in artist_indexes],
+        }
+
+    def artist(self, artist_index):
+        return {'id': make_id('R', artist_index), 'name': f"Artist {artist_index}"}
+
+    def artist_albums(self, artist_index):
+        """An artist's albums as Spotify lists them: albums, then singles, newest first."""
+        albums, _ = self._own_albums(artist_index)
+        previous = (artist_index - 1) % self.artist_count
+        previous_albums, previous_shared = self._own_albums(previous)
+        if previous_shared:
+            albums.append(previous_albums[0])
+
+        albums.sort(key=lambda a: a['release_date'], reverse=True)
+        albums.sort(key=lambda a: a['album_type'] != 'album')
+        return albums
+
+    def album(self, album_id):
+        try:
+            kind, artist_index, n, _ = parse_id(album_id)
+        except ValueError:
+            return None
+        if kind != 'L' or artist_index >= self.artist_count:
+            return None
+        albums, _ = self._own_albums(artist_index)
+        if n >= len(albums):
+            return None
+        return albums[n]
+
+    def album_tracks(self, album):
+        _, artist_index, n, _ = parse_id(album['id'])
+        rng = self._rng('tracks', artist_index, n)
+        tracks = []
+        for t in range(album['total_tracks']):
+            track_id = make_id('T', artist_index, n, t)
+            tracks.append({
+                'id': track_id,
+                'name': f"Track {artist_index}-{n}-{t}",
+                'uri': f"spotify:track:{track_id}",
+                'artists': album['artists'],
+                'duration_ms': rng.randint(90_000, 420_000),
+                'explicit': rng.random() < 0.1,
+                'track_number': t + 1,
+            })
+        return tracks
+
+    def new_releases(self):
+        """Every album released today or yesterday, newest first (what the new-release feeds list)."""
+        if self._new_releases is None:
+            recent = []
+            for artist_index in range(self.artist_count):
+                albums, _ = self._own_albums(artist_index)
+                if (self.today - date.fromisoformat(albums[0]['release_date'])).days <= 1:
+                    recent.append(albums[0])
+            recent.sort(key=lambda a: a['release_date'], reverse=True)
+            self._new_releases = recent
+        return self._new_releases
+
+    def playlist_track(self, playlist_id, offset):
+        rng = self._rng('playlist', playlist_id, offset)
+        artist_index = rng.randrange(self.artist_count)
+        return {'track': {
+            'id': make_id('T', artist_index, 0, offset % 1000),
+            'artists': [self.artist(artist_index)],
+        }}
+
+
+class FakeSpotifyServer:
+    """
+    Threaded HTTP server implementing token refresh, artist albums, album tracks,
+    several albums, playlist snapshots, playlist reads/writes and a Discord webhook.
+
+    Args:
+        catalog: SyntheticCatalog to serve
+        latency_ms: Mean injected latency per request (uniform jitter of +/-50%)
+        max_rps: Requests per second allowed before answering 429 (None = unlimited)
+        error_rate: Probability of an injected 429 on any API request
+        retry_after: Retry-After seconds sent with 429s
+    """
+
+    def __init__(self, catalog, host='127.0.0.1', port=0, latency_ms=0, max_rps=None,
+                 error_rate=0.0, retry_after=1):
+        self.catalog = catalog
+        self.latency_ms = latency_ms
+        self.max_rps = max_rps
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+
+        self.requests = Counter()
+        self.rate_limited = 0
+        self.bytes_sent = 0
+        self.playlist_adds = []
+        self.webhook_messages = []
+        self._webhook_times = []
+
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._rng = random.Random(catalog.seed)
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self):
+        """Environment variables pointing the project at this server."""
+        return {
+            'SPOTIFY_API_URL': f"{self.url}/v1/",
+            'SPOTIFY_TOKEN_URL': f"{self.url}/api/token",
+            'DISCORD_WEBHOOK_URL': f"{self.url}/webhook",
+            'SPOTIFY_CLIENT_ID': 'fake-client-id',
+            'SPOTIFY_CLIENT_SECRET': 'fake-client-secret',
+            'SPOTIFY_REFRESH_TOKEN': 'fake-refresh-token',
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': sum(self.requests.values()),
+                'by_endpoint': dict(self.requests),
+                'rate_limited': self.rate_limited,
+                'bytes_sent': self.bytes_sent,
+                'tracks_added': sum(len(uris) for uris in self.playlist_adds),
+                'webhook_messages': len(self.webhook_messages),
+            }
+
+    def _admit(self, endpoint):
+        """Count the request and decide whether to answer 429."""
+        with self._lock:
+            self.requests[endpoint] += 1
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+
+            limited = (
+                (self.max_rps is not None and self._window_count > self.max_rps)
+                or self._rng.random() < self.error_rate
+            )
+            if limited:
+                self.rate_limited += 1
+            return not limited
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body=None, headers=None):
+                data = json.dumps(body).encode() if body is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+                with server._lock:
+                    server.bytes_sent += len(data)
+
+            def _read_body(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                return self.rfile.read(length) if length else b''
+
+            def _delay(self):
+                if server.latency_ms:
+                    time.sleep(server.latency_ms / 1000 * random.uniform(0.5, 1.5))
+
+            def _page(self, items, query, base_url, limit_default=20, key=None):
+                limit = int(query.get('limit', [limit_default])[0])
+                offset = int(query.get('offset', [0])[0])
+                page_items = items[offset:offset + limit]
+                next_url = None
+                if offset + limit < len(items):
+                    next_url = f"{server.url}{base_url}?offset={offset + limit}&limit={limit}"
+                page = {'items': page_items, 'total': len(items), 'limit': limit,
+                        'offset': offset, 'next': next_url}
+                return {key: page} if key else page
+
+            def do_POST(self):
+                path = urlparse(self.path).path
+                body = self._read_body()
+
+                if path == '/api/token':
+                    server._admit('token')
+                    return self._send(200, {
+                        'access_token': f"fake-token-{time.time_ns()}",
+                        'token_type': 'Bearer',
+                        'expires_in': 3600,
+                        'scope': 'playlist-modify-public playlist-modify-private user-library-read',
+                    })
+
+                if path.startswith('/webhook'):
+                    server._admit('discord_webhook')
+                    # Discord allows 5 webhook messages per 2 seconds and says so in its headers
+                    now = time.monotonic()
+                    with server._lock:
+                        recent = [t for t in server._webhook_times if now - t < 2.0]
+                        if len(recent) >= 5:
+                            retry_after = round(2.0 - (now - recent[0]), 3)
+                            return self._send(429, {'message': 'You are being rate limited.',
+                                                    'retry_after': retry_after, 'global': False})
+                        recent.append(now)
+                        server._webhook_times = recent
+                        server.webhook_messages.append(json.loads(body or b'{}'))
+                    return self._send(204, headers={
+                        'X-RateLimit-Limit': '5',
+                        'X-RateLimit-Remaining': str(5 - len(recent)),
+                        'X-RateLimit-Reset-After': str(round(2.0 - (now - recent[0]), 3)),
+                    })
+
+                match = re.fullmatch(r'/v1/playlists/([^/]+)/(tracks|items)', path)
+                if match:
+                    if not server._admit('playlist_add_items'):
+                        return self._rate_limited()
+                    self._delay()
+                    # spotipy sends the URIs as a bare JSON list; the Web API also accepts {"uris": [...]}
+                    payload = json.loads(body or b'[]')
+                    uris = payload.get('uris', []) if isinstance(payload, dict) else payload
+                    with server._lock:
+                        server.playlist_adds.append(uris)
+                    return self._send(201, {'snapshot_id': f"snap-{len(server.playlist_adds)}"})
+
+                self._send(404, {'error': {'status': 404, 'message': 'Not found'}})
+
+            def _rate_limited(self):
+                self._send(429, {'error': {'status': 429, 'message': 'API rate limit exceeded'}},
+                           headers={'Retry-After': str(server.retry_after)})
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                path, query = parsed.path, parse_qs(parsed.query)
+                catalog = server.catalog
+
+                match = re.fullmatch(r'/v1/artists/([^/]+)/albums', path)
+                if match:
+                    if not server._admit('artist_albums'):
+                        return self._rate_limited()
+                    self._delay()
+                    _, artist_index, _, _ = parse_id(match.group(1))
+                    albums = catalog.artist_albums(artist_index)
+                    etag = '"' + hashlib.md5(','.join(a['id'] for a in albums).encode()).hexdigest() + '"'
+                    if self.headers.get('If-None-Match') == etag:
+                        return self._send(304, headers={'ETag': etag})
+                    return self._send(200, self._page(albums, query, path), headers={'ETag': etag})
+
+                match = re.fullmatch(r'/v1/albums/([^/]+)/tracks', path)
+                if match:
+                    if not server._admit('album_tracks'):
+                        return self._rate_limited()
+                    self._delay()
+                    album = catalog.album(match.group(1))
+                    if album is None:
+                        return self._send(404, {'error': {'status': 404, 'message': 'Non existing id'}})
+                    return self._send(200, self._page(catalog.album_tracks(album), query, path))
+
+                if path in ('/v1/albums', '/v1/albums/'):
+                    if not server._admit('albums'):
+                        return self._rate_limited()
+                    self._delay()
+                    albums = []
+                    for album_id in query.get('ids', [''])[0].split(','):
+                        album = catalog.album(album_id)
+                        if album is not None:
+                            album = dict(album)
+                            tracks_path = f"/v1/albums/{album_id}/tracks"
+                            album['tracks'] = self._page(catalog.album_tracks(album), {'limit': [50]}, tracks_path)
+                        albums.append(album)
+                    return self._send(200, {'albums': albums})
+
+                if path == '/v1/browse/new-releases':
+                    if not server._admit('new_releases'):
+                        return self._rate_limited()
+                    self._delay()
+                    # Like Spotify, the feed stops after ~100 albums
+                    return self._send(200, self._page(catalog.new_releases()[:100], query, path, key='albums'))
+
+                if path == '/v1/search':
+                    if not server._admit('search'):
+                        return self._rate_limited()
+                    self._delay()
+                    if 'album' not in query.get('type', [''])[0].split(','):
+                        return self._send(400, {'error': {'status': 400, 'message': 'Unsupported type'}})
+                    q = query.get('q', [''])[0]
+                    albums = catalog.new_releases() if 'tag:new' in q else []
+                    if int(query.get('offset', [0])[0]) > 1000:
+                        return self._send(400, {'error': {'status': 400, 'message': 'Offset too large'}})
+                    return self._send(200, self._page(albums, query, path, key='albums'))
+
+                match = re.fullmatch(r'/v1/playlists/([^/]+)', path)
+                if match:
+                    if not server._admit('playlist'):
+                        return self._rate_limited()
+                    self._delay()
+                    return self._send(200, {
+                        'id': match.group(1),
+                        'snapshot_id': f"snapshot-{catalog.seed}-{catalog.playlist_size}",
+                        'tracks': {'total': catalog.playlist_size},
+                    })
+
+                match = re.fullmatch(r'/v1/playlists/([^/]+)/(tracks|items)', path)
+                if match:
+                    if not server._admit('playlist_tracks'):
+                        return self._rate_limited()
+                    self._delay()
+                    playlist_id = match.group(1)
+                    limit = int(query.get('limit', [100])[0])
+                    offset = int(query.get('offset', [0])[0])
+                    items = [catalog.playlist_track(playlist_id, i)
+                             for i in range(offset, min(offset + limit, catalog.playlist_size))]
+                    next_url = None
+                    if offset + limit < catalog.playlist_size:
+                        next_url = f"{server.url}{path}?offset={offset + limit}&limit={limit}"
+                    return self._send(200, {'items': items, 'total': catalog.playlist_size,
+                                            'limit': limit, 'offset': offset, 'next': next_url})
+
+                self._send(404, {'error': {'status': 404, 'message': 'Not found'}})
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Spotify Web API stand-in")
+    parser.add_argument('--artists', type=int, default=3300)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--max-rps', type=int, default=None)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeSpotifyServer(
+        SyntheticCatalog(artist_count=args.artists),
+        port=args.port,
+        latency_ms=args.latency_ms,
+        max_rps=args.max_rps,
+        error_rate=args.error_rate
+    )
+    for name, value in server.env().items():
+        print(f"export {name}={value}")
+    print(f"Serving {args.artists} artists on {server.url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
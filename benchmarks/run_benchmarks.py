@@ -0,0 +1,132 @@
+"""
+End-to-end benchmarks for the release scanner, run against the local Spotify stand-in.
+
+Each scenario runs in a fresh subprocess and a fresh working directory (so artist
+caches, dedup stores and checkpoints never leak between runs) and reports wall time,
+requests per second, requests per artist and peak memory.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --artists 3300 50000 --latency-ms 40 --max-rps 100
+    python benchmarks/run_benchmarks.py --json results.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+from fake_spotify import FakeSpotifyServer, SyntheticCatalog
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ('check_new_releases', 'check_new_releases_discovery', 'extract_artist_ids')
+
+def run_child(scenario):
+    """Runs inside the benchmark subprocess: execute one scenario and print its measurements."""
+    import logging
+    import resource
+
+    sys.path.insert(0, REPO_ROOT)
+    import check_new_releases
+    import extract_artists
+    logging.getLogger().setLevel(logging.WARNING)
+
+    start = time.perf_counter()
+    if scenario == 'check_new_releases':
+        check_new_releases.check_new_releases()
+    elif scenario == 'check_new_releases_discovery':
+        check_new_releases.check_new_releases(discovery=True)
+    else:
+        extract_artists.extract_artist_ids()
+    wall_time = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux
+    peak_memory_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({'wall_time': wall_time, 'peak_memory_mb': peak_memory_mb}))
+
+def run_scenario(scenario, artist_count, args):
+    """Start a fake server, run one scenario against it in a subprocess and collect the results."""
+    catalog = SyntheticCatalog(artist_count=artist_count, seed=args.seed, release_rate=args.release_rate)
+    server = FakeSpotifyServer(
+        catalog,
+        latency_ms=args.latency_ms,
+        max_rps=args.max_rps,
+        error_rate=args.error_rate
+    ).start()
+
+    try:
+        with tempfile.TemporaryDirectory(prefix='spotify-bench-') as workdir:
+            with open(os.path.join(workdir, 'artists_id.txt'), 'w') as f:
+                f.write(', '.join(catalog.artist_ids))
+
+            env = dict(os.environ, **server.env())
+            result = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', scenario],
+                cwd=workdir,
+                env=env,
+                capture_output=True,
+                text=True
+            )
+            if result.returncode != 0:
+                raise RuntimeError(f"{scenario} failed:\n{result.stderr[-2000:]}")
+            measurements = json.loads(result.stdout.strip().splitlines()[-1])
+    finally:
+        server.stop()
+
+    stats = server.stats()
+    wall_time = measurements['wall_time']
+    return {
+        'scenario': scenario,
+        'artists': artist_count,
+        'wall_time_s': round(wall_time, 2),
+        'requests': stats['requests'],
+        'requests_per_s': round(stats['requests'] / wall_time, 1) if wall_time else None,
+        'requests_per_artist': round(stats['requests'] / artist_count, 3),
+        'rate_limited': stats['rate_limited'],
+        'tracks_added': stats['tracks_added'],
+        'peak_memory_mb': round(measurements['peak_memory_mb'], 1),
+        'by_endpoint': stats['by_endpoint'],
+    }
+
+def print_report(results):
+    columns = ('scenario', 'artists', 'wall_time_s', 'requests', 'requests_per_s',
+               'requests_per_artist', 'rate_limited', 'tracks_added', 'peak_memory_mb')
+    widths = [max(len(c), *(len(str(r[c])) for r in results)) for c in columns]
+    print('  '.join(c.ljust(w) for c, w in zip(columns, widths)))
+    for r in results:
+        print('  '.join(str(r[c]).ljust(w) for c, w in zip(columns, widths)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scanner against a local Spotify stand-in")
+    parser.add_argument('--artists', type=int, nargs='+', default=[3300])
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--latency-ms', type=float, default=30)
+    parser.add_argument('--max-rps', type=int, default=None)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--release-rate', type=float, default=0.03)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', metavar='PATH', help="also write the results as JSON")
+    parser.add_argument('--child', choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    results = []
+    for artist_count in args.artists:
+        for scenario in args.scenarios:
+            print(f"Running {scenario} with {artist_count} artists...", file=sys.stderr)
+            results.append(run_scenario(scenario, artist_count, args))
+
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,31 @@
+import os
 import time
 import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
+from spotipy import Spotify
 from spotipy.exceptions import SpotifyException
 import config
 from auth_setup import get_spotify_client, get_spotify_manager
-from discord_notifier import send_discord_notification
+from discord_notifier import get_notification_dispatcher
+from rate_limiter import get_rate_limiter
+from client_pool import get_read_pool
+from response_cache import get_response_cache, network_sends
+from metrics import get_metrics
+from artist_cache import ArtistCache, conditional_artist_albums
+from release_store import ReleaseStore
+from routing import Router, unseen_destinations
+from release_scheduler import plan_polls, window_start_for
+from discovery import discover_releases, fallback_sweep
+from pipeline import TrackWriter
+from sharding import (
+    shard_artist_ids, shard_checkpoint_path, PartialFileSink, load_partial_results,
+    partial_cache_path, partial_cache_paths, partial_deferred_path, partial_deferred_paths
+)
+from checkpoint import artist_list_fingerprint, save_checkpoint, load_checkpoint, clear_checkpoint
+from deadline_planner import DeadlinePlanner, load_deferred_artists, save_deferred_artists, prioritize_deferred
 
 logging.basicConfig(
     level=logging.INFO,
@@ -15,17 +36,61 @@ log = logging.getLogger(__name__)
 
 # === Helper to handle rate limit ===
 def safe_spotify_call(func, *args, **kwargs):
-    """Wrap Spotify calls to handle 429 errors (Too Many Requests)."""
+    """
+    Wrap Spotify calls with the shared adaptive rate limiter.
+    Every call waits for a token; a 429 (Too Many Requests) slows the limiter down
+    and pauses all callers for Retry-After seconds before the call is retried.
+    A 401 (access token rejected) refreshes the user token once and retries; concurrent
+    401s share that one refresh (see TokenProvider.refresh).
+    Calls answered from the response cache cost no rate budget; a replay is not paced at all.
+    """
+    limiter = get_rate_limiter()
+    metrics = get_metrics()
+    tokens = get_spotify_manager().tokens
+    cache = get_response_cache()
+    paced = cache is None or cache.mode != 'replay'
+    endpoint = getattr(func, '__name__', 'unknown')
+    reauthorized = False
     while True:
+        if paced:
+            limiter.acquire()
+        token = tokens.token
+        sends = network_sends()
+        start = time.perf_counter()
         try:
-            return func(*args, **kwargs)
+            result = func(*args, **kwargs)
         except SpotifyException as e:
-            if e.http_status == 429:
+            if e.http_status == 401 and not reauthorized:
+                metrics.record_call(endpoint, time.perf_counter() - start, 'unauthorized')
+                log.warning("⚠️ Access token rejected, refreshing it and retrying...")
+                tokens.refresh(stale_token=token)
+                reauthorized = True
+            elif e.http_status == 429:
+                metrics.record_call(endpoint, time.perf_counter() - start, 'throttled')
                 retry_after = int(e.headers.get("Retry-After", 5))
-                log.warning(f"⚠️ Rate limited. Retrying after {retry_after} seconds...")
-                time.sleep(retry_after + 1)
+                metrics.record_throttle(endpoint, retry_after)
+                log.warning(f"⚠️ Rate limited. Retrying after {retry_after} seconds (rate now {limiter.rate:.1f} req/s)...")
+                limiter.on_throttle(retry_after + 1)
             else:
+                metrics.record_call(endpoint, time.perf_counter() - start, 'error')
                 raise e
+        else:
+            metrics.record_call(endpoint, time.perf_counter() - start, 'ok')
+            if cache is not None and network_sends() == sends:
+                # Answered from the cache: says nothing about Spotify's rate limit
+                if paced:
+                    limiter.refund()
+            else:
+                limiter.on_success()
+            return result
+
+def safe_read_call(func, *args, **kwargs):
+    """
+    Catalog reads that need no user scope go to the read-only client pool (see client_pool.py),
+    which spreads them over several apps, each with its own rate limiter.
+    `func` gets the pool's client as first argument, e.g. safe_read_call(Spotify.albums, album_ids).
+    """
+    return get_read_pool().call(func, *args, **kwargs)
 
 # === Date parser ===
 def parse_spotify_date(date_str, precision):
@@ -49,195 +114,550 @@ def load_artist_ids():
         log.error("Artist file not found.")
         return []
 
-def load_added_track_ids():
-    """Load previously added track IDs from both today and yesterday files to prevent duplicates."""
-    track_ids = set()
-    
-    # Load today's releases
-    try:
-        with open('today_releases.txt', 'r') as f:
-            today_tracks = set(line.strip() for line in f if line.strip())
-            track_ids.update(today_tracks)
-            log.info(f"📝 Loaded {len(today_tracks)} track IDs from today_releases.txt")
-    except FileNotFoundError:
-        log.info(f"📝 today_releases.txt not found (first run or empty)")
-    
-    # Load yesterday's releases
-    try:
-        with open('yesterday_releases.txt', 'r') as f:
-            yesterday_tracks = set(line.strip() for line in f if line.strip())
-            track_ids.update(yesterday_tracks)
-            log.info(f"📝 Loaded {len(yesterday_tracks)} track IDs from yesterday_releases.txt")
-    except FileNotFoundError:
-        log.info(f"📝 yesterday_releases.txt not found (first run or empty)")
-    
-    return track_ids
+def open_release_store():
+    """Open the dedup store, migrating the old today/yesterday text files on first use."""
+    store = ReleaseStore()
+    store.import_legacy_files()
+    log.info(f"📝 Loaded dedup store with {len(store)} track IDs (last {store.retention_days} days)")
+    return store
+
+def expire_release_store(store):
+    """Drop track IDs older than the retention window at the end of the run."""
+    log.info("\n🔄 Expiring old track IDs...")
+    expired = store.expire()
+    log.info(f"✅ Expired {expired} track IDs, {len(store)} kept for dedup")
 
-def save_added_track_id(track_id):
-    """Save a track ID to today's tracking file."""
-    with open('today_releases.txt', 'a') as f:
-        f.write(f"{track_id}\n")
+# === Artist scanning ===
+def scan_artist(artist_id, window_start, now, artist_cache=None):
+    """
+    Fetch one artist's album list and keep the albums released in the window.
+
+    Returns a list of (album, release_date) tuples for every album released inside
+    the [window_start, now] window. Tracks are fetched separately (see AlbumTrackCache)
+    so albums shared between artists are only looked up once. Safe to run from worker threads.
 
-def rotate_tracking_files():
+    With an ArtistCache, the album page is requested conditionally and artists whose
+    discography did not change since the last run are skipped.
     """
-    Rotate tracking files at the end of the run:
-    - Move today_releases.txt content to yesterday_releases.txt
-    - Clear today_releases.txt for the next run
+    if artist_cache is None:
+        albums = safe_read_call(Spotify.artist_albums, artist_id, album_type='album,single', limit=20)
+    else:
+        albums, etag, last_modified = safe_read_call(
+            conditional_artist_albums, artist_id, artist_cache.get(artist_id)
+        )
+        if albums is None:
+            artist_cache.touch(artist_id)
+            return []
+        if artist_cache.record(artist_id, albums, etag, last_modified, now=now):
+            return []
+
+    releases = []
+
+    for album in albums['items']:
+        release_date = parse_spotify_date(
+            album['release_date'],
+            album.get('release_date_precision', 'day')
+        )
+
+        if window_start <= release_date <= now:
+            releases.append((album, release_date))
+
+    return releases
+
+def scan_artists(artist_ids, window_start, now, max_workers=8, artist_cache=None, window_starts=None):
     """
-    log.info("\n🔄 Rotating tracking files...")
-    
-    # Read today's releases
-    try:
-        with open('today_releases.txt', 'r') as f:
-            today_content = f.read()
-        
-        # Write to yesterday's file (overwrite)
-        with open('yesterday_releases.txt', 'w') as f:
-            f.write(today_content)
-        
-        # Count tracks for logging
-        track_count = len([line for line in today_content.split('\n') if line.strip()])
-        log.info(f"✅ Moved {track_count} track IDs from today → yesterday")
-        
-        # Clear today's file
-        with open('today_releases.txt', 'w') as f:
-            f.write('')
-        log.info(f"✅ Cleared today_releases.txt for next run")
-        
-    except FileNotFoundError:
-        log.info("📝 No today_releases.txt to rotate (creating empty files)")
-        # Create both files as empty if they don't exist
-        with open('today_releases.txt', 'w') as f:
-            f.write('')
-        with open('yesterday_releases.txt', 'w') as f:
-            f.write('')
+    Scan artists concurrently with a bounded worker pool.
+
+    Keeps up to `max_workers` Spotify requests in flight. Results are returned
+    in the same order as `artist_ids` so the output does not depend on timing.
+    Artists that fail are logged and reported as having no releases.
+    `window_starts` optionally widens the release window per artist (see release_scheduler).
+    """
+    window_starts = window_starts or {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                scan_artist, artist_id, window_starts.get(artist_id, window_start), now, artist_cache
+            )
+            for artist_id in artist_ids
+        ]
+
+        results = []
+        for artist_id, future in zip(artist_ids, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                log.error(f"❌ Error with artist {artist_id}: {e}")
+                results.append([])
+
+    return results
+
+# === Album tracks ===
+class AlbumTrackCache:
+    """
+    Track listings memoized per album ID for the whole run.
+
+    Collaborations and compilations show up under many artists; their tracks are
+    fetched once, using the several-albums endpoint with up to 20 IDs per request.
+    """
+
+    MAX_ALBUMS_PER_REQUEST = 20
+
+    def __init__(self):
+        self._tracks = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def get(self, album_id):
+        """Return the cached tracks of an album ([] if the album could not be fetched)."""
+        with self._lock:
+            return self._tracks.get(album_id, [])
+
+    def _fetch_chunk(self, album_ids):
+        response = safe_read_call(Spotify.albums, album_ids)
+        requests_made = 1
+        fetched = {album_id: [] for album_id in album_ids}
+
+        for album in response['albums']:
+            if not album:
+                continue
+
+            page = album['tracks']
+            tracks = list(page['items'])
+            # The several-albums endpoint embeds the first 50 tracks only
+            while page.get('next'):
+                page = safe_read_call(Spotify.next, page)
+                requests_made += 1
+                tracks.extend(page['items'])
+
+            fetched[album['id']] = tracks
+
+        return fetched, requests_made
+
+    def fetch(self, album_ids, max_workers=8):
+        """Fetch the tracks of every album not cached yet, deduplicated and in chunks of 20."""
+        with self._lock:
+            missing = list(dict.fromkeys(a for a in album_ids if a not in self._tracks))
+
+        if not missing:
+            return
+
+        chunks = [
+            missing[i:i + self.MAX_ALBUMS_PER_REQUEST]
+            for i in range(0, len(missing), self.MAX_ALBUMS_PER_REQUEST)
+        ]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self._fetch_chunk, chunk) for chunk in chunks]
+
+            for chunk, future in zip(chunks, futures):
+                try:
+                    fetched, requests_made = future.result()
+                except Exception as e:
+                    log.error(f"❌ Error fetching tracks for {len(chunk)} albums: {e}")
+                    continue
+
+                with self._lock:
+                    self._tracks.update(fetched)
+                    self.requests += requests_made
+
+    def __contains__(self, album_id):
+        """Whether the album's tracks were fetched (False if its chunk failed)."""
+        with self._lock:
+            return album_id in self._tracks
+
+    def __len__(self):
+        with self._lock:
+            return len(self._tracks)
+
+def revert_unfetched_artists(artist_ids, artist_releases, album_tracks, artist_cache):
+    """
+    Undo the discography cache update of artists whose new albums could not be fetched,
+    so the next run sees their page as changed and processes those albums again.
+    `artist_releases` is scan_artists' result for `artist_ids`.
+    """
+    failed = [
+        artist_id for artist_id, releases in zip(artist_ids, artist_releases)
+        if any(album['id'] not in album_tracks for album, _ in releases)
+    ]
+    for artist_id in failed:
+        artist_cache.revert(artist_id)
+    if failed:
+        log.warning(f"⚠️ Albums of {len(failed)} artists could not be fetched, they are rescanned next run")
+    return failed
+
+# === Playlist writes ===
+class PlaylistSink:
+    """
+    TrackWriter sink that adds a batch of tracks to their destination playlists (the
+    entry's 'playlists', see routing.py) and records their IDs in the release store,
+    per playlist, in the same step. Each playlist gets one write per batch.
+    """
+
+    MAX_TRACKS_PER_REQUEST = 100
+
+    def __init__(self, spotify_manager, release_store):
+        self.spotify_manager = spotify_manager
+        self.release_store = release_store
+
+    def write(self, entries):
+        by_playlist = {}
+        for entry in entries:
+            for playlist_id in entry.get('playlists') or [config.TARGET_PLAYLIST_ID]:
+                by_playlist.setdefault(playlist_id, []).append(entry)
+
+        sp = self.spotify_manager.get_client()
+        for playlist_id, playlist_entries in by_playlist.items():
+            for i in range(0, len(playlist_entries), self.MAX_TRACKS_PER_REQUEST):
+                chunk = playlist_entries[i:i + self.MAX_TRACKS_PER_REQUEST]
+                with get_metrics().phase('playlist_add'):
+                    safe_spotify_call(sp.playlist_add_items, playlist_id, [e['uri'] for e in chunk])
+                self.release_store.add_many((e['id'] for e in chunk), playlist_id=playlist_id)
+            log.info(f"📤 Added {len(playlist_entries)} tracks to playlist {playlist_id}")
+
+    def close(self):
+        pass
+
+class NotifyingPlaylistSink(PlaylistSink):
+    """
+    PlaylistSink that also queues a Discord notification for every written batch, so a
+    track is announced once it is in the playlist, by whichever run (or resumed run) wrote it.
+    """
+
+    def write(self, entries):
+        super().write(entries)
+        notify_new_tracks(entries)
+
+def notify_new_tracks(tracks_info):
+    """
+    Queue the Discord notification for newly written tracks; delivered in the background,
+    main() waits for it once the run is done. A replay posts nothing: its tracks were
+    announced when the run was recorded.
+    """
+    response_cache = get_response_cache()
+    if response_cache and response_cache.mode == 'replay':
+        log.info(f"🗄️ Replay: Discord notification for {len(tracks_info)} tracks skipped")
+        return
+    get_notification_dispatcher().notify(tracks_info)
+
+def track_entry(track, album, release_date, now):
+    """The record kept for a new track: routed to playlists, written to partial files and notifications."""
+    return {
+        'id': track['id'],
+        'name': track['name'],
+        'artists': ', '.join(a['name'] for a in track['artists']),
+        'artist_ids': [a['id'] for a in track['artists']],
+        'album_type': album.get('album_type'),
+        'duration_ms': track.get('duration_ms', 0),
+        'explicit': track.get('explicit', False),
+        'release_date': release_date.strftime('%Y-%m-%d'),
+        'uri': track['uri'],
+        'days_old': (now - release_date).days
+    }
 
 # === Main logic ===
-def check_new_releases(batch_size=20, delay_between_batches=30, delay_between_artists=1.5, max_artists=None):
+def write_new_tracks(album_releases, album_tracks, router, seen_tracks, release_store, writer, now):
+    """
+    Route every track of the given (album, release_date) pairs and queue it for the
+    playlists it was neither routed to in this run nor added to before. The albums'
+    tracks must already be in `album_tracks`. Returns the number of tracks queued.
+    """
+    queued = 0
+    for album, release_date in album_releases:
+        for track in album_tracks.get(album['id']):
+            entry = track_entry(track, album, release_date, now)
+            playlists = unseen_destinations(track['id'], router.destinations(entry), seen_tracks, release_store)
+            
+            if playlists:
+                entry['playlists'] = playlists
+                log.info(f"🎵 New track ({entry['days_old']}d old): {entry['name']} — "
+                         f"{entry['artists']} [{entry['release_date']}]")
+                writer.put(entry)
+                queued += 1
+    return queued
+
+def check_new_releases(batch_size=200, max_workers=None, max_artists=None, resume=False, shard=None,
+                       use_schedule=True, discovery=False, deadline=None):
     """
     Check for new releases from artists and add them to playlist.
-    Tracks releases from yesterday and today only (0-1 day difference).
-    Prevents duplicate additions by tracking individual track IDs using a rolling 2-day window.
+    Tracks releases from yesterday and today (0-1 day difference); artists polled less often
+    by the scheduler are checked back to their last poll.
+    Prevents duplicate additions by tracking individual track IDs in the release store
+    (releases.db), kept for config.DEDUP_RETENTION_DAYS days.
     
-    Optimized for GitHub Actions (6-hour limit) with conservative rate limiting.
-    Processes all artists (~3,300) in approximately 3-4 hours safely.
+    The scan is a streaming pipeline: artists are scanned concurrently by a bounded worker
+    pool (paced only by the shared adaptive rate limiter, see rate_limiter.py), their new
+    albums' tracks are fetched in bulk, and new tracks go through a bounded queue to a
+    writer thread (pipeline.TrackWriter) that adds them to the playlist every 100 tracks
+    or config.WRITER_FLUSH_SECONDS, recording them in the release store at the same time
+    and queueing a Discord notification for each written batch.
     
     Args:
-        batch_size: Number of artists per batch (default: 20 for safety)
-        delay_between_batches: Seconds to wait between batches (default: 30)
-        delay_between_artists: Seconds to wait between artists (default: 1.5)
-        max_artists: Maximum artists to process (default: None = all artists)
+        batch_size: Number of artists per batch; a checkpoint is written after every batch (default: 200)
+        max_workers: Number of Spotify requests kept in flight (default: 8 per app in the read client pool)
+        max_artists: Maximum artists to scan; the rest are deferred to the next run (default: None = all artists)
+        resume: Continue from the last checkpoint instead of rescanning finished artists (default: False)
+        shard: (index, count) to scan only one deterministic shard of the artists and write the
+               results to a partial file for merge_shard_results() instead of the playlist (default: None)
+        use_schedule: Poll only the artists due according to their release history (see release_scheduler);
+                      False polls every artist (default: True)
+        discovery: Find releases through the new-release feeds matched against the artist list
+                   (see discovery.py) and poll artists individually only in a rotating fallback
+                   sweep, every config.DISCOVERY_SWEEP_DAYS runs; overrides use_schedule (default: False)
+        deadline: Wall-clock budget in seconds; concurrency and batch sizes are tuned to finish
+                  in time and the scan stops when it runs out (see deadline_planner) (default: None)
+    
+    After every batch the writer is flushed and a checkpoint (artist cursor) is written,
+    so everything found before the checkpoint is already in the playlist and release store.
+    
+    Artists not reached (max_artists, deadline) are saved to config.DEFERRED_ARTISTS_FILE
+    and scanned first by the next run, with their window reaching back to their last check.
     """
     spotify_manager = get_spotify_manager()
+    read_pool = get_read_pool()
+    max_workers = max_workers or 8 * len(read_pool)
+    # The budget is counted from here, so loading and planning are part of it. Workers are
+    # capped at what the read apps' connection pools hold; more would only wait for a connection
+    planner = DeadlinePlanner(
+        deadline, max_workers, max_workers=config.HTTP_POOL_SIZE * len(read_pool)
+    ) if deadline else None
+    metrics = get_metrics()
     artist_ids = load_artist_ids()
     if not artist_ids:
         log.error("No artist IDs found. Please check artists_id.txt")
         return
 
-    # Process all artists unless max_artists is specified
+    artist_cache = ArtistCache().load()
+    artist_cache.prune(artist_ids)
+
     total_all_artists = len(artist_ids)
-    if max_artists and len(artist_ids) > max_artists:
-        log.warning(f"⚠️ You have {total_all_artists} artists. Processing first {max_artists} due to max_artists limit.")
-        artist_ids = artist_ids[:max_artists]
-    else:
-        log.info(f"🎧 Processing ALL {total_all_artists} artists (no limit)")
+    log.info(f"🎧 Loaded {total_all_artists} artists")
+
+    checkpoint_path = None
+    if shard:
+        shard_index, shard_count = shard
+        artist_ids = shard_artist_ids(artist_ids, shard_index, shard_count)
+        checkpoint_path = shard_checkpoint_path(shard_index, shard_count)
+        log.info(f"🧩 Shard {shard_index}/{shard_count}: {len(artist_ids)} of {total_all_artists} artists")
 
-    now = datetime.now(timezone.utc)
+    checkpoint = load_checkpoint(artist_ids, path=checkpoint_path) if resume else None
+    fingerprint = artist_list_fingerprint(artist_ids)
+
+    response_cache = get_response_cache()
+    if checkpoint:
+        now = datetime.fromisoformat(checkpoint['now'])
+    else:
+        now = datetime.now(timezone.utc)
+        if response_cache:
+            # Recorded with a recording, and read back from it on replay
+            now = response_cache.run_now(now)
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
     yesterday_start = today_start - timedelta(days=1)
     
     log.info(f"📅 Checking for releases from: {yesterday_start.strftime('%Y-%m-%d')} to {now.strftime('%Y-%m-%d %H:%M:%S')}")
     
-    added_track_ids = load_added_track_ids()
-    log.info(f"📝 Total unique track IDs from last 2 days: {len(added_track_ids)}")
+    # The schedule only depends on the saved cache and `now`, so a resumed run gets the same list
+    window_starts = None
+    artist_index = set(artist_ids)
+    if discovery:
+        artist_ids, window_starts = fallback_sweep(artist_ids, artist_cache, now)
+    elif use_schedule:
+        artist_ids, window_starts = plan_polls(artist_ids, artist_cache, now)
     
-    new_tracks = []
-    new_track_ids = []
-    tracks_info = []
+    # Artists the last run did not reach go first, whether or not they are due today
+    deferred = [artist_id for artist_id in load_deferred_artists() if artist_id in artist_index]
+    if deferred:
+        artist_ids = prioritize_deferred(artist_ids, deferred, all_artist_ids=artist_index)
+        window_starts = window_starts or {}
+        for artist_id in deferred:
+            window_starts.setdefault(artist_id, window_start_for(artist_cache.get(artist_id), now))
+        log.info(f"⏰ {len(deferred)} artists deferred by the last run are scanned first")
+    
+    release_store = open_release_store()
+    if shard:
+        # The merge stage dedups against the store and writes the playlist for all shards
+        sink = PartialFileSink(shard_index, shard_count, append=checkpoint is not None)
+    else:
+        sink = NotifyingPlaylistSink(spotify_manager, release_store)
+    writer = TrackWriter(sink, flush_interval=config.WRITER_FLUSH_SECONDS).start()
+    
+    album_tracks = AlbumTrackCache()
+    router = Router()
+    # Only (playlist, track) pairs found in this run and not yet written need to be remembered
+    # here; everything written is in the release store (or the shard's partial file).
+    seen_tracks = defaultdict(set)
+    cursor = checkpoint['cursor'] if checkpoint else 0
+    tracks_found = checkpoint.get('tracks_found', 0) if checkpoint else 0
+    first_artist = cursor
     total_artists = len(artist_ids)
+    scan_limit = total_artists
+    if max_artists and total_artists > max_artists:
+        log.warning(f"⚠️ Scanning the first {max_artists} of {total_artists} artists due to max_artists limit, "
+                    f"deferring the rest")
+        scan_limit = max_artists
+    scan_start = time.time()
     
-    log.info(f"🎧 Checking {total_artists} artists in batches of {batch_size}...")
-    log.info(f"⏱️ Rate limiting: {delay_between_artists}s between artists, {delay_between_batches}s between batches")
-
-    for start in range(0, total_artists, batch_size):
-        sp = spotify_manager.get_client()
-        
-        batch = artist_ids[start:start + batch_size]
-        batch_num = start // batch_size + 1
-        total_batches = -(-total_artists // batch_size)
-        
-        log.info(f"\n🔹 Processing batch {batch_num}/{total_batches} ({len(batch)} artists)")
-
-        for idx, artist_id in enumerate(batch):
-            try:
-                albums = safe_spotify_call(sp.artist_albums, artist_id, album_type='album,single', limit=20)
-                time.sleep(0.5)
-                
-                for album in albums['items']:
-                    release_date = parse_spotify_date(
-                        album['release_date'],
-                        album.get('release_date_precision', 'day')
-                    )
-                    
-                    if release_date < yesterday_start:
-                        continue
-                    
-                    if release_date <= now:
-                        days_diff = (now - release_date).days
-                        
-                        if days_diff <= 1:
-                            tracks = safe_spotify_call(sp.album_tracks, album['id'])['items']
-                            time.sleep(0.5)
-                            
-                            for track in tracks:
-                                track_id = track['id']
-                                
-                                if track_id not in added_track_ids and track_id not in new_track_ids:
-                                    track_name = track['name']
-                                    artists_str = ', '.join(a['name'] for a in track['artists'])
-                                    release_date_str = release_date.strftime('%Y-%m-%d')
-                                    
-                                    log.info(f"🎵 New track ({days_diff}d old): {track_name} — {artists_str} [{release_date_str}]")
-                                    
-                                    new_tracks.append(track['uri'])
-                                    new_track_ids.append(track_id)
-
-                                    tracks_info.append({
-                                        'name': track_name,
-                                        'artists': artists_str,
-                                        'release_date': release_date_str,
-                                        'uri': track['uri'],
-                                        'days_old': days_diff
-                                    })
-
-                time.sleep(delay_between_artists)
-                
-            except Exception as e:
-                log.error(f"❌ Error with artist {artist_id}: {e}")
-                continue
-        
-        if batch_num < total_batches:
-            log.info(f"⏸ Waiting {delay_between_batches}s before next batch...")
-            time.sleep(delay_between_batches)
-
-    if new_tracks:
-        log.info(f"\n📤 Adding {len(new_tracks)} new tracks to playlist...")
-        sp = spotify_manager.get_client()
-        
-        for i in range(0, len(new_tracks), 100):
-            batch_to_add = new_tracks[i:i + 100]
-            safe_spotify_call(sp.playlist_add_items, config.TARGET_PLAYLIST_ID, batch_to_add)
-            time.sleep(2)
-            log.info(f"   Added batch {i // 100 + 1}/{-(-len(new_tracks) // 100)}")
-        
-        for track_id in new_track_ids:
-            save_added_track_id(track_id)
-        
-        log.info(f"✅ Successfully added {len(new_tracks)} new tracks to playlist!")
-
-        # send_discord_notification(tracks_info)
+    log.info(f"🎧 Checking {scan_limit - cursor} artists in batches of {batch_size} with {max_workers} workers...")
+
+    try:
+        # A resumed run already wrote what the feeds had before its first checkpoint
+        if discovery and not checkpoint:
+            with metrics.phase('discovery'):
+                discovered, _ = discover_releases(safe_read_call, artist_index, yesterday_start, now)
+                album_tracks.fetch([album['id'] for album, _ in discovered], max_workers=max_workers)
+            tracks_found += write_new_tracks(
+                discovered, album_tracks, router, seen_tracks, release_store, writer, now
+            )
+            writer.flush()
+
+        while cursor < scan_limit:
+            size = planner.next_batch_size(batch_size) if planner else batch_size
+            if not size:
+                log.warning("⏰ Deadline reached, stopping the scan")
+                break
+            if planner:
+                max_workers = planner.workers
+            batch = artist_ids[cursor:min(cursor + size, scan_limit)]
+            batch_start = time.monotonic()
+            throttles_before = sum(app['throttle_count'] for app in read_pool.stats())
+            
+            log.info(f"\n🔹 Processing artists {cursor + 1}-{cursor + len(batch)} of {scan_limit} "
+                     f"with {max_workers} workers")
+
+            with metrics.phase('artist_scan'):
+                artist_releases = scan_artists(
+                    batch, yesterday_start, now, max_workers=max_workers,
+                    artist_cache=artist_cache, window_starts=window_starts
+                )
+            with metrics.phase('track_fetch'):
+                album_tracks.fetch(
+                    [album['id'] for releases in artist_releases for album, _ in releases],
+                    max_workers=max_workers
+                )
+            revert_unfetched_artists(batch, artist_releases, album_tracks, artist_cache)
+
+            tracks_found += write_new_tracks(
+                [release for releases in artist_releases for release in releases],
+                album_tracks, router, seen_tracks, release_store, writer, now
+            )
+
+            # Everything found so far is written before the cursor moves past it
+            writer.flush()
+            cursor += len(batch)
+            save_checkpoint({
+                'artist_fingerprint': fingerprint,
+                'now': now.isoformat(),
+                'cursor': cursor,
+                'tracks_found': tracks_found,
+            }, path=checkpoint_path)
+            
+            if planner:
+                throttled = sum(app['throttle_count'] for app in read_pool.stats()) > throttles_before
+                planner.record_batch(len(batch), time.monotonic() - batch_start, throttled, scan_limit - cursor)
+    finally:
+        writer.close()
+        sink.close()
+
+    deferred = artist_ids[cursor:]
+    log.info(f"\n⏱️ Scanned {cursor - first_artist} artists in {time.time() - scan_start:.0f}s")
+    if deferred:
+        log.warning(f"⏰ Deferred {len(deferred)} artists to the next run")
+    log.info(f"🗂️ Discography cache: {artist_cache.changed} changed, {artist_cache.unchanged} unchanged, "
+             f"{artist_cache.not_modified} not modified (304)")
+    log.info(f"💿 Fetched tracks for {len(album_tracks)} unique albums in {album_tracks.requests} requests")
+    if response_cache:
+        cache_stats = response_cache.stats()
+        log.info(f"🗄️ Response cache ({cache_stats['mode']}): {cache_stats['hits']} hits, "
+                 f"{cache_stats['misses']} misses, {cache_stats['size_mb']} MB")
+    for app_stats in read_pool.stats():
+        log.info(f"🚦 App {app_stats['name']}: {app_stats['calls']} calls, {app_stats['rate']} req/s now "
+                 f"(peak {app_stats['peak_rate']}), {app_stats['throttle_count']} throttles, "
+                 f"{app_stats['throttled_seconds']}s throttled")
+    metrics.increment('artists_scanned', cursor - first_artist)
+    metrics.increment('artists_deferred', len(deferred))
+    metrics.increment('albums_fetched', len(album_tracks))
+    metrics.increment('tracks_found', writer.written)
+
+    if shard:
+        artist_cache.save(path=partial_cache_path(shard_index, shard_count), artist_ids=artist_ids)
+        save_deferred_artists(deferred, path=partial_deferred_path(shard_index, shard_count))
+        release_store.close()
+        clear_checkpoint(path=checkpoint_path)
+        return
+
+    if tracks_found:
+        log.info(f"✅ Successfully added {tracks_found} new tracks to playlist in {writer.flushes} writes!")
     else:
         log.info("\n✨ No new tracks found from yesterday or today.")
     
-    # Rotate tracking files at the end of the run
-    rotate_tracking_files()
+    # Expire old dedup entries at the end of the run
+    with metrics.phase('rotation'):
+        expire_release_store(release_store)
+    release_store.close()
+
+    # Only persist the discography cache once the new tracks are safely added,
+    # otherwise a failed run would mark unprocessed albums as already seen.
+    artist_cache.save()
+    save_deferred_artists(deferred)
+    clear_checkpoint()
+
+def merge_shard_results():
+    """
+    Merge the partial results written by every shard (see check_new_releases(shard=...)).
+
+    Tracks are combined in shard order, deduplicated per destination playlist across
+    shards and against the release store, and streamed to their playlists in batches of 100. The shards' partial
+    discography caches are folded into artist_cache.json, their deferred artists into
+    config.DEFERRED_ARTISTS_FILE, and the partials removed.
+    """
+    metrics = get_metrics()
+    partials = load_partial_results()
+    if not partials:
+        log.error(f"No partial results found in {config.PARTIALS_DIR}/")
+        return
+
+    release_store = open_release_store()
+    seen_tracks = defaultdict(set)
+    sink = NotifyingPlaylistSink(get_spotify_manager(), release_store)
+    writer = TrackWriter(sink, flush_interval=config.WRITER_FLUSH_SECONDS).start()
+
+    try:
+        for partial in partials:
+            for entry in partial['tracks']:
+                playlists = entry.get('playlists') or [config.TARGET_PLAYLIST_ID]
+                playlists = unseen_destinations(entry['id'], playlists, seen_tracks, release_store)
+                if playlists:
+                    entry['playlists'] = playlists
+                    writer.put(entry)
+    finally:
+        writer.close()
+
+    log.info(f"🧩 Merged {len(partials)} shards: {writer.written} new tracks")
+
+    if writer.written:
+        log.info(f"✅ Successfully added {writer.written} new tracks to playlist!")
+    else:
+        log.info("\n✨ No new tracks found from yesterday or today.")
+
+    with metrics.phase('rotation'):
+        expire_release_store(release_store)
+    release_store.close()
+
+    artist_cache = ArtistCache().load()
+    for path in partial_cache_paths():
+        artist_cache.merge_file(path)
+        os.remove(path)
+    artist_cache.prune(load_artist_ids())
+    artist_cache.save()
+
+    # Missing shards keep no deferred list; their artists are simply scanned next run as usual
+    deferred = []
+    for path in partial_deferred_paths():
+        deferred.extend(load_deferred_artists(path))
+        os.remove(path)
+    save_deferred_artists(deferred)
+    if deferred:
+        log.warning(f"⏰ {len(deferred)} artists deferred by the shards to the next run")
+
+    for partial in partials:
+        os.remove(partial['path'])
@@ -0,0 +1,55 @@
+import os
+import json
+import hashlib
+import logging
+import config
+
+log = logging.getLogger(__name__)
+
+def artist_list_fingerprint(artist_ids):
+    """Short hash of the artist list, so a checkpoint is never resumed against a different list."""
+    return hashlib.sha1(','.join(artist_ids).encode()).hexdigest()[:16]
+
+def save_checkpoint(state, path=None):
+    """
+    Write the scan state atomically (temp file + rename).
+
+    `state` holds the artist cursor, the release window and how many tracks were
+    found so far. The scan flushes its track writer before every checkpoint, so
+    all tracks found before the cursor are already in the playlist and the release
+    store (or the shard's partial file), which is what dedups them on resume.
+    """
+    path = path or config.SCAN_CHECKPOINT_FILE
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+def load_checkpoint(artist_ids, path=None):
+    """Return the saved scan state, or None if there is no usable checkpoint."""
+    path = path or config.SCAN_CHECKPOINT_FILE
+    try:
+        with open(path, 'r') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        log.info("📍 No checkpoint found, starting a fresh scan")
+        return None
+    except ValueError as e:
+        log.warning(f"⚠️ Could not parse checkpoint {path} ({e}), starting a fresh scan")
+        return None
+
+    if state.get('artist_fingerprint') != artist_list_fingerprint(artist_ids):
+        log.warning("⚠️ Artist list changed since the checkpoint was written, starting a fresh scan")
+        return None
+
+    log.info(f"📍 Resuming from checkpoint: {state['cursor']} artists scanned, "
+             f"{state.get('tracks_found', 0)} tracks already added")
+    return state
+
+def clear_checkpoint(path=None):
+    """Remove the checkpoint after a successful run."""
+    path = path or config.SCAN_CHECKPOINT_FILE
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
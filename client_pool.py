@@ -0,0 +1,201 @@
+import os
+import time
+import logging
+import threading
+import spotipy
+from spotipy.oauth2 import SpotifyClientCredentials
+from spotipy.cache_handler import MemoryCacheHandler
+from spotipy.exceptions import SpotifyException
+import config
+from auth_setup import build_session
+from token_provider import TokenProvider, token_cache_path
+from metrics import get_metrics
+from rate_limiter import AdaptiveRateLimiter, get_rate_limiter
+from response_cache import get_response_cache, network_sends
+
+log = logging.getLogger(__name__)
+
+class ReadApp:
+    """
+    One Spotify app used for catalog reads with the client-credentials flow.
+
+    Each app has its own pooled session, its own token (a TokenProvider refreshing it in
+    the background and sharing it with other processes) and its own rate limiter, since
+    Spotify rate-limits per app.
+    After a 429 the app is unhealthy until its Retry-After has passed.
+    """
+
+    def __init__(self, name, client_id, client_secret, limiter=None):
+        self.name = name
+        self.session = build_session()
+
+        self.credentials = SpotifyClientCredentials(
+            client_id=client_id,
+            client_secret=client_secret,
+            requests_session=self.session,
+            cache_handler=MemoryCacheHandler()
+        )
+        self.credentials.OAUTH_TOKEN_URL = config.SPOTIFY_TOKEN_URL
+        self.tokens = TokenProvider(
+            self._request_token, cache_path=token_cache_path(f"app-{client_id}"), name=f"app {name}"
+        ).start()
+        self.client = spotipy.Spotify(auth_manager=self.tokens, requests_session=self.session)
+        self.client.prefix = config.SPOTIFY_API_URL
+
+        self.limiter = limiter or AdaptiveRateLimiter(
+            initial_rate=config.SPOTIFY_INITIAL_RATE,
+            min_rate=config.SPOTIFY_MIN_RATE,
+            max_rate=config.SPOTIFY_MAX_RATE
+        )
+        self.unhealthy_until = 0.0
+        self.calls = 0
+
+    def _request_token(self):
+        self.credentials.get_access_token(as_dict=False, check_cache=False)
+        return self.credentials.cache_handler.get_cached_token()
+
+    @property
+    def healthy(self):
+        return time.monotonic() >= self.unhealthy_until
+
+    def on_throttle(self, retry_after):
+        self.unhealthy_until = max(self.unhealthy_until, time.monotonic() + retry_after)
+        self.limiter.on_throttle(retry_after + 1)
+
+    def stats(self):
+        return dict(self.limiter.stats(), name=self.name, calls=self.calls, healthy=self.healthy)
+
+class ReadClientPool:
+    """
+    Round-robin pool of client-credential apps for read-only catalog calls.
+
+    Only playlist writes need the user's OAuth token; artist albums, album tracks,
+    playlist reads and searches work with any app's token. Spreading them over several
+    apps multiplies the rate budget. Unhealthy (throttled) apps are skipped until they
+    recover; if every app is throttled, calls go to the one that recovers first.
+
+    The first app is the project's own (SPOTIFY_CLIENT_ID), which shares the process-wide
+    rate limiter with the user-token writes made by the same app.
+    """
+
+    def __init__(self, apps):
+        if not apps:
+            raise ValueError("ReadClientPool needs at least one app")
+        self.apps = apps
+        self._lock = threading.Lock()
+        self._cursor = 0
+
+    def __len__(self):
+        return len(self.apps)
+
+    def _next_app(self):
+        with self._lock:
+            for _ in range(len(self.apps)):
+                app = self.apps[self._cursor]
+                self._cursor = (self._cursor + 1) % len(self.apps)
+                if app.healthy:
+                    app.calls += 1
+                    return app
+
+            app = min(self.apps, key=lambda a: a.unhealthy_until)
+            app.calls += 1
+            return app
+
+    def call(self, func, *args, **kwargs):
+        """
+        Run `func(client, *args, **kwargs)` on the next healthy app, e.g.
+        pool.call(spotipy.Spotify.albums, album_ids).
+
+        Each call waits for its app's rate limiter. A 429 marks the app unhealthy for
+        Retry-After seconds and the call is retried on another app. A 401 refreshes the
+        app's token (once per call) and retries; other errors are raised.
+        Calls answered from the response cache cost no rate budget; a replay is not paced at all.
+        """
+        metrics = get_metrics()
+        cache = get_response_cache()
+        paced = cache is None or cache.mode != 'replay'
+        endpoint = getattr(func, '__name__', 'unknown')
+        reauthorized = False
+        while True:
+            app = self._next_app()
+            if paced:
+                app.limiter.acquire()
+            token = app.tokens.token
+            sends = network_sends()
+            start = time.perf_counter()
+            try:
+                result = func(app.client, *args, **kwargs)
+            except SpotifyException as e:
+                if e.http_status == 401 and not reauthorized:
+                    metrics.record_call(endpoint, time.perf_counter() - start, 'unauthorized')
+                    log.warning(f"⚠️ App {app.name} token rejected, refreshing it and retrying...")
+                    app.tokens.refresh(stale_token=token)
+                    reauthorized = True
+                elif e.http_status == 429:
+                    metrics.record_call(endpoint, time.perf_counter() - start, 'throttled')
+                    retry_after = int(e.headers.get("Retry-After", 5))
+                    metrics.record_throttle(endpoint, retry_after)
+                    app.on_throttle(retry_after)
+                    healthy = sum(a.healthy for a in self.apps)
+                    log.warning(f"⚠️ App {app.name} rate limited for {retry_after} seconds "
+                                f"({healthy} of {len(self.apps)} read apps healthy)")
+                else:
+                    metrics.record_call(endpoint, time.perf_counter() - start, 'error')
+                    raise e
+            else:
+                metrics.record_call(endpoint, time.perf_counter() - start, 'ok')
+                if cache is not None and network_sends() == sends:
+                    # Answered from the cache: says nothing about Spotify's rate limit
+                    if paced:
+                        app.limiter.refund()
+                else:
+                    app.limiter.on_success()
+                return result
+
+    def stats(self):
+        """Per-app limiter state and call counts, for logging and metrics."""
+        return [app.stats() for app in self.apps]
+
+def parse_read_apps(value):
+    """Parse SPOTIFY_READ_APPS ('client_id:client_secret,client_id:client_secret') into pairs."""
+    apps = []
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        client_id, sep, client_secret = item.partition(':')
+        if not sep or not client_id or not client_secret:
+            raise ValueError("Invalid SPOTIFY_READ_APPS entry, expected client_id:client_secret")
+        apps.append((client_id, client_secret))
+    return apps
+
+
+# Global instance for easy access
+_read_pool = None
+_read_pool_lock = threading.Lock()
+
+def get_read_pool():
+    """
+    Returns the process-wide ReadClientPool: the project's own app plus every extra app
+    listed in config.SPOTIFY_READ_APPS. Safe to call multiple times.
+    """
+    global _read_pool
+
+    with _read_pool_lock:
+        if _read_pool is None:
+            apps = [ReadApp(
+                'main',
+                os.environ.get("SPOTIFY_CLIENT_ID"),
+                os.environ.get("SPOTIFY_CLIENT_SECRET"),
+                limiter=get_rate_limiter()
+            )]
+            for n, (client_id, client_secret) in enumerate(parse_read_apps(config.SPOTIFY_READ_APPS), start=2):
+                apps.append(ReadApp(f"app-{n}", client_id, client_secret))
+            _read_pool = ReadClientPool(apps)
+            log.info(f"🔑 Read client pool: {len(apps)} app(s)")
+
+    return _read_pool
+
+def read_pool_stats():
+    """Per-app stats of the read pool, or [] if no read call was made in this process."""
+    return _read_pool.stats() if _read_pool is not None else []
@@ -1,4 +1,5 @@
 # config.py
+import os
 
 # Local playlist URLs for testing
 PLAYLIST_URLS = [
@@ -10,8 +11,87 @@ PLAYLIST_URLS = [
 
 TARGET_PLAYLIST_ID = '2Z5YAQGFSWgtuWo0LlbCGF'
 
+# Extra destination playlists fed by the same scan (see routing.Route); TARGET_PLAYLIST_ID
+# always gets every track. Example:
+# PLAYLIST_ROUTES = [
+#     {'playlist_id': '...', 'name': 'singles', 'album_types': ['single']},
+#     {'playlist_id': '...', 'name': 'clean', 'explicit': False, 'max_duration_ms': 600000},
+#     {'playlist_id': '...', 'name': 'favourites', 'artists': 'favourite_artists.txt'},
+# ]
+PLAYLIST_ROUTES = []
+
 ARTISTS_FILE = 'artists_id.txt'
 ADDED_TRACKS_FILE = 'added_tracks.txt'
+PLAYLIST_SNAPSHOTS_FILE = 'playlist_snapshots.json'  # snapshot_id per source playlist, for incremental extraction
+ARTIST_CACHE_FILE = 'artist_cache.json'
+ARTIST_CACHE_MAX_ENTRIES = 20000
+SCAN_CHECKPOINT_FILE = 'scan_checkpoint.json'
+RELEASES_DB = 'releases.db'
+METRICS_FILE = 'metrics.json'
+METRICS_PROM_FILE = 'metrics.prom'
+PARTIALS_DIR = 'partials'  # Per-shard scan results waiting for the merge stage
+
+DEDUP_RETENTION_DAYS = 90  # How long added track IDs are remembered to prevent duplicates
+
+# Release-likelihood scheduler: artists with a release in the last ACTIVE_ARTIST_DAYS
+# are polled every run, dormant ones less often but at least every MAX_STALENESS_DAYS
+ACTIVE_ARTIST_DAYS = 60
+MAX_STALENESS_DAYS = 7
+
+# Feed discovery (--discovery): new releases are found in browse/new-releases and a
+# `tag:new` album search (plus one search per extra filter, e.g. 'genre:"metalcore"'),
+# and every artist is still polled directly once every DISCOVERY_SWEEP_DAYS runs
+DISCOVERY_COUNTRY = None  # Market for browse/new-releases, e.g. 'US' (None = global)
+DISCOVERY_SEARCH_FILTERS = []
+DISCOVERY_SWEEP_DAYS = 7
 
 DAYS_THRESHOLD = 1  # Use 0.5 if you want "12 hours" check locally
 
+# Artists a run did not reach (deadline or max_artists), scanned first by the next run
+DEFERRED_ARTISTS_FILE = 'deferred_artists.json'
+# Seconds of a --deadline budget kept back for the final writes and saves
+DEADLINE_RESERVE_SECONDS = 120
+
+# The scan's writer stage adds tracks to the playlist every 100 tracks or after this many seconds
+WRITER_FLUSH_SECONDS = 60
+
+# Watch mode (--watch): artists are polled continuously at WATCH_POLL_RATE artists/second;
+# active artists come up every WATCH_CYCLE_SECONDS, dormant ones every few cycles
+WATCH_POLL_RATE = 1.0
+WATCH_CYCLE_SECONDS = 6 * 3600
+WATCH_WORKERS = 4
+WATCH_SAVE_SECONDS = 300  # How often the daemon saves the artist cache
+
+# Pooled HTTP connections per host (keep above the scanner's max_workers)
+HTTP_POOL_SIZE = 16
+
+# Adaptive rate limiter (requests per second) shared by all Spotify calls
+SPOTIFY_INITIAL_RATE = 10
+SPOTIFY_MIN_RATE = 1
+SPOTIFY_MAX_RATE = 30
+
+# Extra Spotify apps for read-only catalog calls, as "client_id:client_secret,client_id:client_secret".
+# Each app has its own rate budget; the project's own app is always part of the pool.
+SPOTIFY_READ_APPS = os.environ.get('SPOTIFY_READ_APPS', '')
+
+# On-disk Spotify response cache (see response_cache.py). SPOTIFY_CACHE_MODE is one of
+# off, cache (per-endpoint TTLs), record (capture a whole run) or replay (serve a recording offline)
+SPOTIFY_CACHE_MODE = os.environ.get('SPOTIFY_CACHE_MODE', 'cache')
+RESPONSE_CACHE_FILE = os.environ.get('SPOTIFY_CACHE_FILE', 'response_cache.db')
+RESPONSE_CACHE_MAX_MB = 200
+RESPONSE_CACHE_TTLS = {  # seconds; endpoints not listed are not cached
+    'album_tracks': 30 * 86400,  # track listings of a released album practically never change
+    'albums': 30 * 86400,
+    'artist_albums': 3600,  # new releases show up here, so only reuse within a rerun
+    'new_releases': 3600,
+    'search': 3600,
+}
+
+# Access tokens are refreshed in the background this long before they expire, and shared
+# between processes (e.g. shards) through cache files in TOKEN_CACHE_DIR (see token_provider.py)
+TOKEN_REFRESH_MARGIN_SECONDS = 300
+TOKEN_CACHE_DIR = os.environ.get('SPOTIFY_TOKEN_CACHE_DIR', '.spotify_tokens')
+
+# Spotify endpoints, overridable to point at a local stand-in (see benchmarks/fake_spotify.py)
+SPOTIFY_API_URL = os.environ.get('SPOTIFY_API_URL', 'https://api.spotify.com/v1/')
+SPOTIFY_TOKEN_URL = os.environ.get('SPOTIFY_TOKEN_URL', 'https://accounts.spotify.com/api/token')
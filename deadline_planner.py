@@ -0,0 +1,125 @@
+import os
+import re
+import json
+import math
+import time
+import logging
+import config
+
+log = logging.getLogger(__name__)
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)([hms]?)')
+_UNIT_SECONDS = {'h': 3600, 'm': 60, 's': 1, '': 1}
+
+def parse_duration(value):
+    """Parse a '--deadline' value such as '2h', '90m', '1h30m' or '5400' (seconds) into seconds."""
+    value = value.strip().lower()
+    parts = _DURATION_PART.findall(value)
+    if not parts or ''.join(n + u for n, u in parts) != value:
+        raise ValueError(f"Invalid duration '{value}', expected e.g. 2h, 90m or 1h30m")
+    return sum(float(number) * _UNIT_SECONDS[unit] for number, unit in parts)
+
+def format_duration(seconds):
+    seconds = max(0, int(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+class DeadlinePlanner:
+    """
+    Fits the artist scan into a wall-clock budget.
+
+    After every batch the planner updates its throughput estimate (artists per second,
+    smoothed over batches) and the projected time to finish. While the projection
+    overshoots the deadline and Spotify is not throttling, it raises the number of
+    workers; on throttling it backs off, since more concurrency would only add 429s.
+    Batches are sized to take about `target_batch_seconds` so the plan is revisited
+    often, and the last batch is cut to what still fits. The scan stops when the budget
+    is used up; the artists it did not reach are deferred to the next run.
+
+    `reserve_seconds` of the budget are kept back for the writes and saves at the end of the run.
+    `max_workers` caps the concurrency it raises to (default: four times `workers`); pass
+    what the HTTP connection pools can hold, since workers beyond that only queue for a connection.
+    """
+
+    def __init__(self, budget_seconds, workers, max_workers=None, reserve_seconds=None,
+                 target_batch_seconds=60, min_batch_size=20):
+        reserve_seconds = config.DEADLINE_RESERVE_SECONDS if reserve_seconds is None else reserve_seconds
+        self.budget_seconds = budget_seconds
+        self.deadline = time.monotonic() + budget_seconds - reserve_seconds
+        self.min_workers = workers
+        self.max_workers = max(workers, max_workers or workers * 4)
+        self.workers = workers
+        self.target_batch_seconds = target_batch_seconds
+        self.min_batch_size = min_batch_size
+        self.throughput = None  # artists per second
+
+    @property
+    def remaining_seconds(self):
+        return self.deadline - time.monotonic()
+
+    def next_batch_size(self, default):
+        """
+        Size of the next batch: about target_batch_seconds of work, never past the deadline.
+        Until a batch has been measured there is nothing to size it by, so it is a small probe.
+        """
+        if self.remaining_seconds <= 0:
+            return 0
+        if self.throughput is None:
+            return min(default, self.min_batch_size)
+
+        size = max(self.min_batch_size, int(self.throughput * self.target_batch_seconds))
+        fits = int(self.throughput * self.remaining_seconds)
+        return min(size, fits)
+
+    def record_batch(self, artists, seconds, throttled, artists_left):
+        """Update the throughput estimate after a batch and retune the worker count."""
+        if artists and seconds > 0:
+            rate = artists / seconds
+            self.throughput = rate if self.throughput is None else 0.5 * self.throughput + 0.5 * rate
+
+        if not self.throughput:
+            return
+
+        needed = artists_left / self.throughput
+        remaining = self.remaining_seconds
+        if throttled and self.workers > self.min_workers:
+            self.workers = max(self.min_workers, math.floor(self.workers * 0.75))
+            log.info(f"⏳ Throttled, lowering concurrency to {self.workers} workers")
+        elif needed > remaining and self.workers < self.max_workers:
+            self.workers = min(self.max_workers, math.ceil(self.workers * 1.5))
+            log.info(f"⏳ Behind schedule, raising concurrency to {self.workers} workers")
+
+        log.info(f"⏳ Deadline: {format_duration(remaining)} left, {artists_left} artists at "
+                 f"{self.throughput:.1f}/s need ~{format_duration(needed)}")
+
+def load_deferred_artists(path=None):
+    """Artists the previous run did not reach, in the order they should be scanned."""
+    path = path or config.DEFERRED_ARTISTS_FILE
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+    except ValueError as e:
+        log.warning(f"⚠️ Could not parse {path} ({e}), ignoring deferred artists")
+        return []
+
+def save_deferred_artists(artist_ids, path=None):
+    """Write the deferred artists atomically; an empty list means the last run finished."""
+    path = path or config.DEFERRED_ARTISTS_FILE
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(artist_ids, f, indent=0)
+    os.replace(tmp_path, path)
+
+def prioritize_deferred(artist_ids, deferred, all_artist_ids=None):
+    """
+    Move the deferred artists to the front, in their deferred order. Deferred artists
+    missing from `artist_ids` (e.g. not due by the schedule) are added as long as they
+    are still in `all_artist_ids` (any container supporting `in`).
+    """
+    known = all_artist_ids if all_artist_ids is not None else set(artist_ids)
+    first = [artist_id for artist_id in dict.fromkeys(deferred) if artist_id in known]
+    first_set = set(first)
+    return first + [artist_id for artist_id in artist_ids if artist_id not in first_set]
@@ -1,14 +1,245 @@
 import os
+import time
+import queue
 import logging
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 
 log = logging.getLogger(__name__)
 
+USERNAME = "Spotify New UK Hardcore Tracks Radar"
+FOOTER_TEXT = "Spotify Auto Playlist"
+
+# Discord webhook limits
+MAX_FIELDS_PER_EMBED = 25
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_CHARS_PER_MESSAGE = 6000  # title + description + field names/values + footer, over all embeds
+MAX_FIELD_NAME = 256
+MAX_FIELD_VALUE = 1024
+
+_STOP = object()
+
+def _truncate(text, limit):
+    return text if len(text) <= limit else text[:limit - 1] + '…'
+
+def _track_field(idx, track):
+    days_old = track.get('days_old', 'N/A')
+    days_text = "today" if days_old == 0 else f"{days_old}d ago"
+    return {
+        "name": _truncate(f"{idx}. {track['name']}", MAX_FIELD_NAME),
+        "value": _truncate(f"**Artists:** {track['artists']}\n**Released:** {track['release_date']} ({days_text})",
+                           MAX_FIELD_VALUE),
+        "inline": False
+    }
+
+def _new_embed(title, description=None):
+    embed = {
+        "title": title,
+        "color": 1947988,
+        "timestamp": datetime.utcnow().isoformat(),
+        "footer": {
+            "text": FOOTER_TEXT
+        },
+        "fields": []
+    }
+    if description:
+        embed["description"] = description
+    return embed
+
+def _embed_size(embed):
+    return len(embed['title']) + len(embed.get('description', '')) + len(embed['footer']['text'])
+
+def build_messages(tracks_info):
+    """
+    Pack every track into webhook messages within Discord's limits: 25 fields per embed,
+    10 embeds and 6000 characters per message. Returns the list of message payloads,
+    so no track is left out however many there are.
+    """
+    track_count = len(tracks_info)
+    title = f"🎵 {track_count} New Track{'s' if track_count != 1 else ''} Added to Playlist!"
+    description = f"Found {track_count} new release{'s' if track_count != 1 else ''} from your followed artists."
+
+    messages = []
+    embeds = []
+    embed = None
+    chars = 0
+
+    for idx, track in enumerate(tracks_info, 1):
+        field = _track_field(idx, track)
+        field_size = len(field['name']) + len(field['value'])
+
+        if (embed is None or len(embed['fields']) >= MAX_FIELDS_PER_EMBED
+                or chars + field_size > MAX_CHARS_PER_MESSAGE):
+            if embed is None:
+                embed = _new_embed(title, description)
+            else:
+                embed = _new_embed(f"🎵 New tracks (continued from #{idx - 1})")
+            embed_size = _embed_size(embed)
+
+            if embeds and (len(embeds) >= MAX_EMBEDS_PER_MESSAGE
+                           or chars + embed_size + field_size > MAX_CHARS_PER_MESSAGE):
+                messages.append({"username": USERNAME, "embeds": embeds})
+                embeds = []
+                chars = 0
+
+            embeds.append(embed)
+            chars += embed_size
+
+        embed['fields'].append(field)
+        chars += field_size
+
+    if embeds:
+        messages.append({"username": USERNAME, "embeds": embeds})
+    return messages
+
+class NotificationDispatcher:
+    """
+    Delivers Discord notifications from a background thread, so the scan never waits on Discord.
+
+    notify() only queues the tracks. The dispatcher thread packs them into as many
+    messages as needed (see build_messages) and posts them over one pooled session,
+    following the webhook's rate-limit headers: when X-RateLimit-Remaining hits 0 it
+    waits X-RateLimit-Reset-After seconds, and on a 429 it waits `retry_after`.
+    Connection errors and 5xx responses are retried with exponential backoff.
+    """
+
+    MAX_RETRIES = 5
+
+    def __init__(self, webhook_url=None, session=None):
+        self.webhook_url = webhook_url or os.environ.get('DISCORD_WEBHOOK_URL')
+        if session is None:
+            # Not the Spotify session: the webhook URL holds a secret and stays out of the metrics
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
+            session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.session = session
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='discord-notifier', daemon=True)
+        self._blocked_until = 0.0
+
+        self.messages_sent = 0
+        self.messages_failed = 0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def notify(self, tracks_info):
+        """Queue a notification for these tracks; returns immediately."""
+        if not self.webhook_url:
+            log.warning("⚠️ DISCORD_WEBHOOK_URL not set. Skipping Discord notification.")
+            return False
+        if not tracks_info:
+            log.info("No tracks to notify about.")
+            return False
+        self._queue.put(list(tracks_info))
+        return True
+
+    def close(self, timeout=None):
+        """Deliver everything queued, then stop the dispatcher thread."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            log.warning(f"⚠️ Discord notifications still pending after {timeout}s, giving up")
+
+    def _run(self):
+        while True:
+            tracks_info = self._queue.get()
+            if tracks_info is _STOP:
+                return
+
+            messages = build_messages(tracks_info)
+            delivered = sum(self.post(message) for message in messages)
+            if delivered == len(messages):
+                log.info(f"✅ Discord notification sent successfully! ({len(tracks_info)} tracks, "
+                         f"{len(messages)} messages)")
+            else:
+                log.error(f"❌ Only {delivered} of {len(messages)} Discord messages were delivered")
+
+    def _wait_for_rate_limit(self):
+        wait = self._blocked_until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+    def _record_rate_limit(self, response):
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset_after = response.headers.get('X-RateLimit-Reset-After')
+        if remaining is not None and reset_after is not None and int(remaining) == 0:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + float(reset_after))
+
+    def post(self, payload):
+        """Post one message, blocking until it is delivered or retries run out."""
+        for attempt in range(self.MAX_RETRIES + 1):
+            self._wait_for_rate_limit()
+            backoff = 2 ** attempt
+            try:
+                response = self.session.post(self.webhook_url, json=payload, timeout=10)
+            except requests.exceptions.RequestException as e:
+                log.warning(f"⚠️ Discord webhook request failed ({e}), retrying in {backoff}s")
+                time.sleep(backoff)
+                continue
+
+            self._record_rate_limit(response)
+
+            if response.status_code in [200, 204]:
+                self.messages_sent += 1
+                return True
+
+            if response.status_code == 429:
+                try:
+                    retry_after = float(response.json().get('retry_after'))
+                except (ValueError, TypeError, AttributeError):
+                    retry_after = float(response.headers.get('Retry-After', backoff))
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+                log.warning(f"⚠️ Discord rate limited, retrying in {retry_after:.1f}s")
+                continue
+
+            if response.status_code >= 500:
+                log.warning(f"⚠️ Discord webhook returned {response.status_code}, retrying in {backoff}s")
+                time.sleep(backoff)
+                continue
+
+            log.error(f"❌ Discord webhook failed with status {response.status_code}: {response.text}")
+            break
+
+        self.messages_failed += 1
+        return False
+
+
+# Global instance for easy access
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def get_notification_dispatcher():
+    """
+    Returns the process-wide, started NotificationDispatcher.
+    Safe to call multiple times - will reuse the same dispatcher instance.
+    """
+    global _dispatcher
+
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher().start()
+
+    return _dispatcher
+
+def close_notification_dispatcher(timeout=300):
+    """Wait for queued notifications to be delivered (no-op if nothing was ever queued)."""
+    global _dispatcher
+
+    with _dispatcher_lock:
+        dispatcher, _dispatcher = _dispatcher, None
+    if dispatcher is not None:
+        dispatcher.close(timeout)
+
 def send_discord_notification(tracks_info):
     """
-    Send a Discord webhook notification with newly added tracks.
-    
+    Send a Discord webhook notification with newly added tracks, synchronously.
+    Long lists are split over several embeds and messages (see build_messages).
+    The scan uses get_notification_dispatcher().notify() instead, which does not block.
+
     Args:
         tracks_info: List of dictionaries containing track information:
             [
@@ -21,110 +252,49 @@ def send_discord_notification(tracks_info):
                 },
                 ...
             ]
-    
+
     Returns:
-        bool: True if notification sent successfully, False otherwise
+        bool: True if every message was sent successfully, False otherwise
     """
-    webhook_url = os.environ.get('DISCORD_WEBHOOK_URL')
-    
-    if not webhook_url:
+    dispatcher = NotificationDispatcher()
+    if not dispatcher.webhook_url:
         log.warning("⚠️ DISCORD_WEBHOOK_URL not set. Skipping Discord notification.")
         return False
-    
+
     if not tracks_info:
         log.info("No tracks to notify about.")
         return False
-    
-    try:
-        track_count = len(tracks_info)
-        
-        embed = {
-            "title": f"🎵 {track_count} New Track{'s' if track_count != 1 else ''} Added to Playlist!",
-            "description": f"Found {track_count} new release{'s' if track_count != 1 else ''} from your followed artists.",
-            "color": 1947988,
-            "timestamp": datetime.utcnow().isoformat(),
-            "footer": {
-                "text": "Spotify Auto Playlist"
-            },
-            "fields": []
-        }
-        
-        for idx, track in enumerate(tracks_info[:25], 1):
-            track_name = track['name']
-            artists = track['artists']
-            release_date = track['release_date']
-            days_old = track.get('days_old', 'N/A')
-            
-            days_text = "today" if days_old == 0 else f"{days_old}d ago"
-            
-            field_value = f"**Artists:** {artists}\n**Released:** {release_date} ({days_text})"
-            
-            embed['fields'].append({
-                "name": f"{idx}. {track_name}",
-                "value": field_value,
-                "inline": False
-            })
-        
-        if track_count > 25:
-            embed['fields'].append({
-                "name": "➕ More tracks",
-                "value": f"...and {track_count - 25} more tracks!",
-                "inline": False
-            })
-        
-        payload = {
-            "username": "Spotify New UK Hardcore Tracks Radar",
-            "embeds": [embed]
-        }
-        
-        response = requests.post(webhook_url, json=payload, timeout=10)
-        
-        if response.status_code in [200, 204]:
-            log.info(f"✅ Discord notification sent successfully! ({track_count} tracks)")
-            return True
-        else:
-            log.error(f"❌ Discord webhook failed with status {response.status_code}: {response.text}")
-            return False
-            
-    except requests.exceptions.RequestException as e:
-        log.error(f"❌ Failed to send Discord notification: {e}")
-        return False
-    except Exception as e:
-        log.error(f"❌ Unexpected error sending Discord notification: {e}")
-        return False
+
+    messages = build_messages(tracks_info)
+    delivered = sum(dispatcher.post(message) for message in messages)
+    if delivered == len(messages):
+        log.info(f"✅ Discord notification sent successfully! ({len(tracks_info)} tracks)")
+        return True
+    log.error(f"❌ Only {delivered} of {len(messages)} Discord messages were delivered")
+    return False
 
 
 def send_simple_notification(message):
     """
     Send a simple text message to Discord (fallback/utility function).
-    
+
     Args:
         message (str): Plain text message to send
-    
+
     Returns:
         bool: True if notification sent successfully, False otherwise
     """
-    webhook_url = os.environ.get('DISCORD_WEBHOOK_URL')
-    
-    if not webhook_url:
+    dispatcher = NotificationDispatcher()
+    if not dispatcher.webhook_url:
         log.warning("⚠️ DISCORD_WEBHOOK_URL not set. Skipping Discord notification.")
         return False
-    
-    try:
-        payload = {
-            "username": "Spotify Bot",
-            "content": message
-        }
-        
-        response = requests.post(webhook_url, json=payload, timeout=10)
-        
-        if response.status_code in [200, 204]:
-            log.info("✅ Discord notification sent successfully!")
-            return True
-        else:
-            log.error(f"❌ Discord webhook failed with status {response.status_code}")
-            return False
-            
-    except Exception as e:
-        log.error(f"❌ Failed to send Discord notification: {e}")
-        return False
+
+    payload = {
+        "username": "Spotify Bot",
+        "content": message
+    }
+
+    if dispatcher.post(payload):
+        log.info("✅ Discord notification sent successfully!")
+        return True
+    return False
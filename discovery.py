@@ -0,0 +1,92 @@
+import logging
+from datetime import datetime
+import config
+from sharding import shard_of
+from release_scheduler import window_start_for
+
+log = logging.getLogger(__name__)
+
+PAGE_SIZE = 50
+NEW_RELEASES_MAX = 100   # browse/new-releases stops paging after ~100 albums
+SEARCH_MAX_OFFSET = 1000  # search results cannot be paged past offset 1000
+
+def _parse_release_date(album):
+    value = album['release_date']
+    precision = album.get('release_date_precision', 'day')
+    if precision == 'year':
+        value += '-01-01'
+    elif precision == 'month':
+        value += '-01'
+    return datetime.fromisoformat(value)
+
+def _page_albums(call, fetch, max_items):
+    """Page an albums feed by offset until it runs out or hits the endpoint's cap."""
+    for offset in range(0, max_items, PAGE_SIZE):
+        page = call(fetch, offset)['albums']
+        yield from (album for album in page['items'] if album)
+        if not page.get('next'):
+            break
+
+def iter_feed_albums(call):
+    """
+    Every album in Spotify's new-release feeds: browse/new-releases plus a `tag:new`
+    album search (once unfiltered and once per config.DISCOVERY_SEARCH_FILTERS entry,
+    e.g. 'genre:"hardcore"' or 'label:"..."'). Albums may repeat across feeds.
+    """
+    def new_releases(sp, offset):
+        return sp.new_releases(country=config.DISCOVERY_COUNTRY, limit=PAGE_SIZE, offset=offset)
+
+    yield from _page_albums(call, new_releases, NEW_RELEASES_MAX)
+
+    for search_filter in [''] + list(config.DISCOVERY_SEARCH_FILTERS):
+        query = f"tag:new {search_filter}".strip()
+
+        def search(sp, offset, query=query):
+            return sp.search(q=query, type='album', limit=PAGE_SIZE, offset=offset)
+
+        yield from _page_albums(call, search, SEARCH_MAX_OFFSET)
+
+def discover_releases(call, artist_index, window_start, now):
+    """
+    Find releases in the window by paging the new-release feeds once and matching album
+    artists against `artist_index` (a set of followed artist IDs), instead of polling
+    every artist. The number of requests depends on how much was released, not on how
+    many artists we follow.
+
+    `call` runs each request with a client (safe_read_call). Returns (releases, matched_artist_ids)
+    where releases is a list of (album, release_date) tuples, deduplicated by album.
+    """
+    releases = {}
+    matched_artist_ids = set()
+
+    for album in iter_feed_albums(call):
+        if album['id'] in releases:
+            continue
+
+        followed = [a['id'] for a in album['artists'] if a['id'] in artist_index]
+        if not followed:
+            continue
+
+        release_date = _parse_release_date(album).replace(tzinfo=now.tzinfo)
+        if window_start <= release_date <= now:
+            releases[album['id']] = (album, release_date)
+            matched_artist_ids.update(followed)
+
+    log.info(f"📰 Discovery feeds: {len(releases)} new albums from {len(matched_artist_ids)} followed artists")
+    return list(releases.values()), matched_artist_ids
+
+def fallback_sweep(artist_ids, artist_cache, now, days=None):
+    """
+    The slower per-artist sweep that backs up feed discovery.
+
+    Feeds only list primary album artists and can miss releases, so every artist is
+    still polled once every `days` runs: artists are spread evenly over the days by
+    hash, and each is scanned back to its last check. Returns (artist_ids, window_starts).
+    """
+    days = days or config.DISCOVERY_SWEEP_DAYS
+    todays_slot = now.date().toordinal() % days
+    sweep = [artist_id for artist_id in artist_ids if shard_of(artist_id, days) == todays_slot]
+    window_starts = {artist_id: window_start_for(artist_cache.get(artist_id), now) for artist_id in sweep}
+
+    log.info(f"🧹 Fallback sweep: {len(sweep)} of {len(artist_ids)} artists (slot {todays_slot + 1}/{days})")
+    return sweep, window_starts
@@ -1,9 +1,15 @@
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
+from spotipy import Spotify
+from concurrent.futures import ThreadPoolExecutor
 import config
+from client_pool import get_read_pool
 import warnings
 warnings.filterwarnings('ignore')
 import os
+import json
+
+# Only the fields we need: every track's artist IDs
+ITEM_FIELDS = 'items(track(artists(id))),total'
+PAGE_SIZE = 100
 
 def extract_playlist_id(url):
     """Extract playlist ID from Spotify URL"""
@@ -12,53 +18,100 @@ def extract_playlist_id(url):
         return playlist_id
     return url
 
-def get_all_tracks_from_playlist(sp, playlist_id):
-    """Get all tracks from a playlist with pagination"""
-    tracks = []
-    results = sp.playlist_tracks(playlist_id)
-    tracks.extend(results['items'])
-    
-    while results['next']:
-        results = sp.next(results)
-        tracks.extend(results['items'])
-    
-    return tracks
-
-def extract_artist_ids():
-    """Extract all unique artist IDs from configured playlists"""
-    client_credentials_manager = SpotifyClientCredentials(
-        client_id=os.environ.get("SPOTIFY_CLIENT_ID"),
-        client_secret=os.environ.get("SPOTIFY_CLIENT_SECRET")
-    )
-    sp = spotipy.Spotify(client_credentials_manager=client_credentials_manager)
-    
+def get_playlist_artist_ids(read_pool, playlist_id, max_workers=8):
+    """
+    Get the artist IDs of every track in a playlist.
+    The first page gives the total; the remaining pages are fetched in parallel by offset,
+    spread over the apps of the read client pool.
+    """
+    def fetch_page(offset):
+        return read_pool.call(
+            Spotify.playlist_items,
+            playlist_id, fields=ITEM_FIELDS, limit=PAGE_SIZE, offset=offset, additional_types=('track',)
+        )
+
+    first_page = fetch_page(0)
+    offsets = range(PAGE_SIZE, first_page['total'], PAGE_SIZE)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pages = [first_page] + list(executor.map(fetch_page, offsets))
+
     artist_ids = set()
-    
+    for page in pages:
+        for item in page['items']:
+            if item['track'] and item['track']['artists']:
+                for artist in item['track']['artists']:
+                    if artist['id']:
+                        artist_ids.add(artist['id'])
+    return artist_ids
+
+def load_existing_artist_ids():
+    try:
+        with open(config.ARTISTS_FILE, 'r') as f:
+            return {x.strip() for x in f.read().split(',') if x.strip()}
+    except FileNotFoundError:
+        return set()
+
+def load_playlist_snapshots():
+    try:
+        with open(config.PLAYLIST_SNAPSHOTS_FILE, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_playlist_snapshots(snapshots):
+    with open(config.PLAYLIST_SNAPSHOTS_FILE, 'w') as f:
+        json.dump(snapshots, f, indent=2, sort_keys=True)
+
+def extract_artist_ids(incremental=True):
+    """
+    Extract all unique artist IDs from configured playlists.
+
+    In incremental mode (default), playlists whose snapshot_id has not changed since the
+    last run are skipped, and artist IDs from changed playlists are merged into the
+    existing artists_id.txt instead of rebuilding it. incremental=False re-reads every
+    playlist and rebuilds the file from scratch.
+
+    The output is sorted so the committed file produces small diffs.
+    """
+    read_pool = get_read_pool()
+
+    artist_ids = load_existing_artist_ids() if incremental else set()
+    snapshots = load_playlist_snapshots() if incremental else {}
+    known_artists = len(artist_ids)
+
     print(f"Processing {len(config.PLAYLIST_URLS)} playlist(s)...")
-    
+
     for playlist_url in config.PLAYLIST_URLS:
         playlist_id = extract_playlist_id(playlist_url)
-        print(f"Fetching tracks from playlist: {playlist_id}")
-        
+
         try:
-            tracks = get_all_tracks_from_playlist(sp, playlist_id)
-            print(f"Found {len(tracks)} tracks in playlist")
-            
-            for item in tracks:
-                if item['track'] and item['track']['artists']:
-                    for artist in item['track']['artists']:
-                        artist_ids.add(artist['id'])
-            
+            playlist = read_pool.call(Spotify.playlist, playlist_id, fields='snapshot_id,tracks.total')
+            snapshot_id = playlist['snapshot_id']
+            if snapshots.get(playlist_id) == snapshot_id:
+                print(f"Playlist {playlist_id} unchanged (snapshot {snapshot_id[:12]}...), skipping")
+                continue
+
+            print(f"Fetching {playlist['tracks']['total']} tracks from playlist: {playlist_id}")
+            playlist_artist_ids = get_playlist_artist_ids(read_pool, playlist_id)
+            print(f"Found {len(playlist_artist_ids)} artists in playlist")
+
+            artist_ids.update(playlist_artist_ids)
+            snapshots[playlist_id] = snapshot_id
+
         except Exception as e:
             print(f"Error processing playlist {playlist_id}: {e}")
             continue
-    
-    print(f"Total unique artists found: {len(artist_ids)}")
-    
-    artist_ids = [aid for aid in artist_ids if aid]
-    
-    with open(config.ARTISTS_FILE, 'w') as f:
-        f.write(', '.join(artist_ids))
-    
+
+    print(f"Total unique artists found: {len(artist_ids)} ({len(artist_ids) - known_artists} new)")
+
+    # Temp file + rename, so a running --watch daemon never reads a half-written list
+    tmp_path = f"{config.ARTISTS_FILE}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(', '.join(sorted(artist_ids)))
+    os.replace(tmp_path, config.ARTISTS_FILE)
+
+    # Saved after the artist file, so a failed write never marks a playlist as processed
+    save_playlist_snapshots(snapshots)
+
     print(f"Artist IDs saved to {config.ARTISTS_FILE}")
     return len(artist_ids)
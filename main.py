@@ -1,11 +1,132 @@
+import sys
+import argparse
+import subprocess
 import extract_artists
 import check_new_releases
+import watch
+import config
+from metrics import get_metrics
+from rate_limiter import get_rate_limiter
+from client_pool import read_pool_stats
+from response_cache import get_response_cache
+from discord_notifier import close_notification_dispatcher
+from sharding import parse_shard, shard_name
+from deadline_planner import parse_duration
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Spotify auto playlist")
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help="continue an interrupted scan from its last checkpoint, if there is one (CI always passes this)"
+    )
+    parser.add_argument(
+        '--full-scan',
+        action='store_true',
+        help="poll every artist instead of only those the release scheduler marks as due"
+    )
+    parser.add_argument(
+        '--discovery',
+        action='store_true',
+        help="find releases through the new-release feeds, polling each artist only in a weekly fallback sweep"
+    )
+    parser.add_argument(
+        '--deadline',
+        type=parse_duration,
+        metavar='DURATION',
+        help="finish the scan within this wall-clock budget (e.g. 2h, 90m), deferring unreached artists"
+    )
+    parser.add_argument(
+        '--shard',
+        type=parse_shard,
+        metavar='i/N',
+        help="scan only shard i (0-based) of N and write partial results instead of the playlist"
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help="run as a daemon that polls artists continuously and adds releases within minutes"
+    )
+    parser.add_argument(
+        '--merge',
+        action='store_true',
+        help="merge the partial results of all shards and add them to the playlist"
+    )
+    parser.add_argument(
+        '--processes',
+        type=int,
+        metavar='N',
+        help="scan N shards in parallel local processes, then merge"
+    )
+    return parser.parse_args()
+
+def run_sharded(processes, resume=False, full_scan=False, discovery=False, deadline=None):
+    """Run every shard in its own process, then merge once they all finish."""
+    flags = (
+        (['--resume'] if resume else [])
+        + (['--full-scan'] if full_scan else [])
+        + (['--discovery'] if discovery else [])
+        + (['--deadline', f"{deadline}s"] if deadline else [])
+    )
+    commands = [
+        [sys.executable, __file__, '--shard', f"{i}/{processes}"] + flags
+        for i in range(processes)
+    ]
+    workers = [subprocess.Popen(command) for command in commands]
+    failed = [i for i, worker in enumerate(workers) if worker.wait() != 0]
+    if failed:
+        # Keep the partials of the shards that finished; rerun the failed ones with --resume
+        raise SystemExit(f"Shards {failed} failed, not merging")
+    check_new_releases.merge_shard_results()
+
+def write_metrics(shard=None):
+    """Write the run metrics (JSON and Prometheus text), one file per shard when sharded."""
+    json_path, prom_path = config.METRICS_FILE, config.METRICS_PROM_FILE
+    if shard:
+        suffix = shard_name(*shard)
+        json_path = json_path.replace('.json', f".{suffix}.json")
+        prom_path = prom_path.replace('.prom', f".{suffix}.prom")
+
+    metrics = get_metrics()
+    response_cache = get_response_cache()
+    metrics.write_json(json_path, extra={
+        'rate_limiter': get_rate_limiter().stats(),
+        'read_apps': read_pool_stats(),
+        'response_cache': response_cache.stats() if response_cache else None,
+    })
+    metrics.write_prometheus(prom_path)
+    print(f"Metrics written to {json_path} and {prom_path}")
 
 def main():
+    args = parse_args()
+    # Before anything loads the state files: a recording snapshots them, a replay swaps in the recorded ones
+    get_response_cache()
     #print("Extracting artist IDs...")
     #extract_artists.extract_artist_ids()
-    print("Checking for new releases...")
-    check_new_releases.check_new_releases()
+    try:
+        if args.watch:
+            print("Watching for new releases (Ctrl+C to stop)...")
+            watch.run_watch_daemon()
+        elif args.merge:
+            print("Merging shard results...")
+            check_new_releases.merge_shard_results()
+        elif args.processes:
+            print(f"Checking for new releases in {args.processes} processes...")
+            run_sharded(
+                args.processes, resume=args.resume, full_scan=args.full_scan, discovery=args.discovery,
+                deadline=args.deadline
+            )
+        else:
+            print("Checking for new releases...")
+            check_new_releases.check_new_releases(
+                resume=args.resume, shard=args.shard, use_schedule=not args.full_scan,
+                discovery=args.discovery, deadline=args.deadline
+            )
+    finally:
+        # Let queued Discord notifications go out before the process exits
+        close_notification_dispatcher()
+        # Written even when the run fails, so it is clear where the time went
+        write_metrics(shard=args.shard)
     print("Done!")
 
 if __name__ == '__main__':
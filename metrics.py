@@ -0,0 +1,234 @@
+import re
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+# Upper bounds of the latency buckets, in seconds (the last bucket is +Inf)
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Spotify IDs in URL paths are folded into {id} so requests group by route
+_ID_SEGMENT = re.compile(r'/[0-9A-Za-z]{22}(?=/|$)')
+
+class LatencyHistogram:
+    """Cumulative-bucket latency histogram (Prometheus style) with count, sum and max."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """Estimate of the q-th percentile (upper bound of the bucket it falls in)."""
+        if not self.count:
+            return 0.0
+        target = q / 100 * self.count
+        running = 0
+        for bound, count in zip(self.buckets + (self.max,), self.counts):
+            running += count
+            if running >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum_s': round(self.sum, 3),
+            'mean_s': round(self.sum / self.count, 4) if self.count else 0.0,
+            'p50_s': self.percentile(50),
+            'p95_s': self.percentile(95),
+            'p99_s': self.percentile(99),
+            'max_s': round(self.max, 4),
+            'buckets': {
+                **{str(bound): count for bound, count in zip(self.buckets, self.counts)},
+                '+Inf': self.counts[-1],
+            },
+        }
+
+
+class RunMetrics:
+    """
+    Metrics for one run, collected from the Spotify call path.
+
+    safe_spotify_call records a latency histogram, outcome counts and 429 waits per
+    endpoint; the HTTP session hook records requests and bytes per route;
+    TokenProvider counts token refreshes; check_new_releases times its phases.
+    Everything is thread-safe and written out at the end of the run as JSON and,
+    optionally, Prometheus text format.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.latency = {}
+        self.outcomes = {}
+        self.throttles = {}
+        self.retry_after_seconds = 0.0
+        self.http_requests = {}
+        self.http_bytes = {}
+        self.http_cache_hits = {}
+        self.token_refreshes = 0
+        self.phases = {}
+        self.counters = {}
+
+    def record_call(self, endpoint, seconds, outcome):
+        """One attempt of a Spotify call; outcome is 'ok', 'throttled', 'unauthorized' or 'error'."""
+        with self._lock:
+            self.latency.setdefault(endpoint, LatencyHistogram()).observe(seconds)
+            outcomes = self.outcomes.setdefault(endpoint, {})
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    def record_throttle(self, endpoint, retry_after):
+        with self._lock:
+            self.throttles[endpoint] = self.throttles.get(endpoint, 0) + 1
+            self.retry_after_seconds += retry_after
+
+    def record_token_refresh(self):
+        with self._lock:
+            self.token_refreshes += 1
+
+    def increment(self, name, value=1):
+        """Free-form run counter (e.g. tracks found, albums fetched)."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def response_hook(self, response, *args, **kwargs):
+        """
+        requests response hook: count requests and response bytes per route. Responses
+        served by the response cache (X-Cache: HIT) are counted as cache hits instead.
+        """
+        route = f"{response.request.method} {_ID_SEGMENT.sub('/{id}', urlparse(response.url).path)}"
+        if response.headers.get('X-Cache') == 'HIT':
+            with self._lock:
+                self.http_cache_hits[route] = self.http_cache_hits.get(route, 0) + 1
+            return response
+        size = len(response.content or b'')
+        with self._lock:
+            self.http_requests[route] = self.http_requests.get(route, 0) + 1
+            self.http_bytes[route] = self.http_bytes.get(route, 0) + size
+        return response
+
+    @contextmanager
+    def phase(self, name):
+        """Accumulate wall time spent in a phase (phases may be entered many times)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def to_dict(self, extra=None):
+        with self._lock:
+            data = {
+                'started_at': self.started_at,
+                'duration_s': round(time.time() - self.started_at, 3),
+                'endpoints': {
+                    endpoint: {
+                        'latency': histogram.to_dict(),
+                        'outcomes': dict(self.outcomes.get(endpoint, {})),
+                        'throttles': self.throttles.get(endpoint, 0),
+                    }
+                    for endpoint, histogram in sorted(self.latency.items())
+                },
+                'http': {
+                    route: {
+                        'requests': self.http_requests.get(route, 0),
+                        'bytes': self.http_bytes.get(route, 0),
+                        'cache_hits': self.http_cache_hits.get(route, 0),
+                    }
+                    for route in sorted(self.http_requests.keys() | self.http_cache_hits.keys())
+                },
+                'requests_total': sum(self.http_requests.values()),
+                'cache_hits_total': sum(self.http_cache_hits.values()),
+                'bytes_total': sum(self.http_bytes.values()),
+                'throttles_total': sum(self.throttles.values()),
+                'retry_after_total_s': round(self.retry_after_seconds, 1),
+                'token_refreshes': self.token_refreshes,
+                'phases_s': {name: round(seconds, 3) for name, seconds in self.phases.items()},
+                'counters': dict(self.counters),
+            }
+        if extra:
+            data.update(extra)
+        return data
+
+    def write_json(self, path, extra=None):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(extra), f, indent=2)
+
+    def write_prometheus(self, path):
+        """Write the metrics in Prometheus text exposition format."""
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP spotify_{name} {help_text}")
+            lines.append(f"# TYPE spotify_{name} {kind}")
+
+        with self._lock:
+            metric('call_duration_seconds', 'histogram', 'Spotify call latency per endpoint')
+            for endpoint, histogram in sorted(self.latency.items()):
+                running = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    running += count
+                    lines.append(f'spotify_call_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {running}')
+                lines.append(f'spotify_call_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {histogram.count}')
+                lines.append(f'spotify_call_duration_seconds_sum{{endpoint="{endpoint}"}} {histogram.sum:.6f}')
+                lines.append(f'spotify_call_duration_seconds_count{{endpoint="{endpoint}"}} {histogram.count}')
+
+            metric('http_requests_total', 'counter', 'HTTP requests per route')
+            for route, count in sorted(self.http_requests.items()):
+                lines.append(f'spotify_http_requests_total{{route="{route}"}} {count}')
+
+            metric('http_cache_hits_total', 'counter', 'Requests per route answered by the response cache')
+            for route, count in sorted(self.http_cache_hits.items()):
+                lines.append(f'spotify_http_cache_hits_total{{route="{route}"}} {count}')
+
+            metric('http_response_bytes_total', 'counter', 'Response bytes per route')
+            for route, size in sorted(self.http_bytes.items()):
+                lines.append(f'spotify_http_response_bytes_total{{route="{route}"}} {size}')
+
+            metric('throttles_total', 'counter', '429 responses per endpoint')
+            for endpoint, count in sorted(self.throttles.items()):
+                lines.append(f'spotify_throttles_total{{endpoint="{endpoint}"}} {count}')
+
+            metric('retry_after_seconds_total', 'counter', 'Total Retry-After wait requested by 429s')
+            lines.append(f'spotify_retry_after_seconds_total {self.retry_after_seconds:.1f}')
+
+            metric('token_refreshes_total', 'counter', 'Access token refreshes')
+            lines.append(f'spotify_token_refreshes_total {self.token_refreshes}')
+
+            metric('phase_seconds', 'gauge', 'Wall time spent per run phase')
+            for name, seconds in sorted(self.phases.items()):
+                lines.append(f'spotify_phase_seconds{{phase="{name}"}} {seconds:.3f}')
+
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+
+# Global instance for the whole run
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def get_metrics():
+    """
+    Returns the process-wide RunMetrics instance.
+    Safe to call multiple times - will reuse the same instance.
+    """
+    global _metrics
+
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = RunMetrics()
+
+    return _metrics
@@ -0,0 +1,105 @@
+import time
+import queue
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+_FLUSH = 'flush'
+_STOP = 'stop'
+
+class TrackWriter:
+    """
+    Writer stage of the streaming scan pipeline.
+
+    The scan pushes new tracks as it finds them into a bounded queue (so a slow writer
+    applies back-pressure instead of growing memory). A background thread hands them to
+    `sink.write(entries)` every `batch_size` tracks, or after `flush_interval` seconds
+    if fewer are pending. The sink does the playlist write and records the dedup entries
+    in the same step, so progress is durable as soon as a batch is written.
+
+    flush() is a barrier: it returns once everything queued before it is written, which
+    is what the checkpoint relies on. A sink error stops further writes and is re-raised
+    in the scanning thread on the next put()/flush()/close().
+    """
+
+    def __init__(self, sink, batch_size=100, flush_interval=60.0, queue_size=1000):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name='track-writer', daemon=True)
+        self._error = None
+
+        self.written = 0
+        self.flushes = 0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def put(self, entry):
+        """Queue one track entry (blocks while the queue is full)."""
+        self._raise_if_failed()
+        self._queue.put(entry)
+
+    def flush(self):
+        """Write everything queued so far and wait for it."""
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        done.wait()
+        self._raise_if_failed()
+
+    def close(self):
+        """Write what is left and stop the writer thread."""
+        done = threading.Event()
+        self._queue.put((_STOP, done))
+        self._thread.join()
+        self._raise_if_failed()
+
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise RuntimeError(f"Track writer failed: {self._error}") from self._error
+
+    def _run(self):
+        pending = []
+        deadline = None
+
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if pending else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                # flush_interval elapsed with a partial batch
+                self._write(pending)
+                pending = []
+                continue
+
+            if isinstance(item, tuple):
+                command, done = item
+                self._write(pending)
+                pending = []
+                done.set()
+                if command == _STOP:
+                    return
+                continue
+
+            pending.append(item)
+            if len(pending) == 1:
+                deadline = time.monotonic() + self.flush_interval
+            if len(pending) >= self.batch_size:
+                self._write(pending)
+                pending = []
+
+    def _write(self, entries):
+        if not entries or self._error is not None:
+            return
+        try:
+            self.sink.write(entries)
+        except Exception as e:
+            log.error(f"❌ Failed to write {len(entries)} tracks: {e}")
+            self._error = e
+            return
+
+        self.written += len(entries)
+        self.flushes += 1
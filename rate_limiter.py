@@ -0,0 +1,129 @@
+import time
+import asyncio
+import threading
+import config
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket shared by every Spotify call, tuned by 429 feedback (AIMD).
+
+    While calls succeed the rate grows additively (roughly `increase` requests/second
+    every second at full throughput). On a 429 the rate is cut multiplicatively and
+    all callers pause for the Retry-After period. Safe to share between threads and
+    coroutines: tokens are reserved under a lock and the waiting happens outside it.
+    """
+
+    def __init__(self, initial_rate=10.0, min_rate=1.0, max_rate=30.0, burst=5,
+                 increase=0.5, decrease_factor=0.5):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+
+        self._rate = min(max(initial_rate, min_rate), max_rate)
+        self._lock = threading.Lock()
+        self._tat = 0.0  # theoretical arrival time of the next request
+        self._blocked_until = 0.0
+        self._last_cut = 0.0
+
+        self.throttle_count = 0
+        self.throttled_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.peak_rate = self._rate
+
+    @property
+    def rate(self):
+        """Current allowed rate in requests per second."""
+        return self._rate
+
+    def _reserve(self):
+        """Reserve one token and return how long the caller has to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            interval = 1.0 / self._rate
+            tolerance = (self.burst - 1) * interval
+
+            start = max(now, self._blocked_until, self._tat - tolerance)
+            self._tat = max(self._tat, start) + interval
+
+            wait = start - now
+            self.wait_seconds += wait
+            return wait
+
+    def acquire(self):
+        """Block the calling thread until a request may be sent."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait (without blocking the event loop) until a request may be sent."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def refund(self):
+        """Give back a token whose call never reached Spotify (answered from the response cache)."""
+        with self._lock:
+            self._tat -= 1.0 / self._rate
+
+    def on_success(self):
+        """Additive increase after a successful call."""
+        with self._lock:
+            self._rate = min(self.max_rate, self._rate + self.increase / self._rate)
+            self.peak_rate = max(self.peak_rate, self._rate)
+
+    def on_throttle(self, retry_after):
+        """
+        Multiplicative decrease after a 429, and pause everyone for `retry_after` seconds.
+        Concurrent 429s from the same burst only cut the rate once.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.throttle_count += 1
+
+            if now >= self._last_cut + 1.0 and now >= self._blocked_until:
+                self._rate = max(self.min_rate, self._rate * self.decrease_factor)
+                self._last_cut = now
+
+            blocked_until = now + retry_after
+            if blocked_until > self._blocked_until:
+                self.throttled_seconds += blocked_until - max(now, self._blocked_until)
+                self._blocked_until = blocked_until
+
+            # Do not let a backlog of reservations burst out after the pause.
+            self._tat = max(self._tat, self._blocked_until)
+
+    def stats(self):
+        """Snapshot of the limiter state, for logging and metrics."""
+        with self._lock:
+            return {
+                'rate': round(self._rate, 2),
+                'peak_rate': round(self.peak_rate, 2),
+                'throttle_count': self.throttle_count,
+                'throttled_seconds': round(self.throttled_seconds, 1),
+                'wait_seconds': round(self.wait_seconds, 1),
+            }
+
+
+# Global instance shared by every Spotify call in the process
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """
+    Returns the process-wide AdaptiveRateLimiter.
+    Safe to call multiple times - will reuse the same limiter instance.
+    """
+    global _rate_limiter
+
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = AdaptiveRateLimiter(
+                initial_rate=config.SPOTIFY_INITIAL_RATE,
+                min_rate=config.SPOTIFY_MIN_RATE,
+                max_rate=config.SPOTIFY_MAX_RATE
+            )
+
+    return _rate_limiter
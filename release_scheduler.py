@@ -0,0 +1,102 @@
+import math
+import logging
+from datetime import date, datetime, timedelta, timezone
+import config
+
+log = logging.getLogger(__name__)
+
+FRIDAY = 4
+
+def _parse_date(value):
+    """Parse a Spotify release date of any precision ('2024', '2024-05', '2024-05-17')."""
+    if len(value) == 4:
+        value += '-01-01'
+    elif len(value) == 7:
+        value += '-01'
+    return date.fromisoformat(value)
+
+def polling_interval(entry, today):
+    """
+    Days between polls for an artist, from the release history in its ArtistCache entry.
+
+    Artists that released recently (or that we know nothing about) are polled every
+    run. Others are polled less often the longer and more regular their silence,
+    capped at config.MAX_STALENESS_DAYS. On Fridays, when most releases land, every
+    interval is halved.
+    """
+    release_dates = [_parse_date(d) for d in (entry or {}).get('release_dates') or []]
+    if not release_dates:
+        interval = 1
+    else:
+        days_since_last = (today - release_dates[0]).days
+        if days_since_last <= config.ACTIVE_ARTIST_DAYS:
+            interval = 1
+        else:
+            gaps = sorted((a - b).days for a, b in zip(release_dates, release_dates[1:]))
+            typical_gap = gaps[len(gaps) // 2] if gaps else 365
+            interval = math.ceil(min(typical_gap, days_since_last) / 30)
+
+    if today.weekday() == FRIDAY:
+        interval = math.ceil(interval / 2)
+
+    return max(1, min(interval, config.MAX_STALENESS_DAYS))
+
+def window_start_for(entry, now):
+    """
+    Start of the release window to scan an artist with: yesterday, or the day before its
+    last check if that is earlier, so nothing released since the last poll is missed.
+    """
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    yesterday_start = today_start - timedelta(days=1)
+    checked_at = (entry or {}).get('checked_at')
+    if checked_at is None:
+        return yesterday_start
+
+    last_checked = datetime.fromtimestamp(checked_at, tz=timezone.utc)
+    last_checked_day = last_checked.replace(hour=0, minute=0, second=0, microsecond=0)
+    return min(yesterday_start, last_checked_day - timedelta(days=1))
+
+def plan_polls(artist_ids, artist_cache, now):
+    """
+    Pick the artists due for a poll this run, most likely to have released first.
+
+    Returns (due_artist_ids, window_starts): window_starts maps every due artist to the
+    start of the release window it must be scanned with. Artists with an interval of
+    one day are due on every run; the others once their interval (in calendar days since
+    the last check) has passed. For an artist skipped on previous runs the window reaches
+    back to the day before its last check, so nothing released in between is missed.
+    """
+    today = now.date()
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    yesterday_start = today_start - timedelta(days=1)
+
+    due = []
+    window_starts = {}
+    for position, artist_id in enumerate(artist_ids):
+        entry = artist_cache.get(artist_id)
+        interval = polling_interval(entry, today)
+        checked_at = (entry or {}).get('checked_at')
+
+        if checked_at is None:
+            # Never checked: poll now, ahead of everyone else
+            due.append((-math.inf, position, artist_id))
+            window_starts[artist_id] = yesterday_start
+            continue
+
+        last_checked = datetime.fromtimestamp(checked_at, tz=timezone.utc)
+        days_since_check = (today - last_checked.date()).days
+        # Active artists are polled on every run, including a second run on the same day
+        if interval > 1 and days_since_check < interval:
+            continue
+
+        # Active artists first, then the most overdue relative to their interval
+        priority = -(1 / interval + days_since_check / interval)
+        due.append((priority, position, artist_id))
+        window_starts[artist_id] = window_start_for(entry, now)
+
+    due.sort()
+    due_artist_ids = [artist_id for _, _, artist_id in due]
+
+    friday = " (Friday boost)" if today.weekday() == FRIDAY else ""
+    log.info(f"📆 Scheduler: {len(due_artist_ids)} of {len(artist_ids)} artists due for a poll{friday}")
+    return due_artist_ids, window_starts
@@ -0,0 +1,133 @@
+import os
+import time
+import sqlite3
+import threading
+import logging
+import config
+
+log = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400
+
+class ReleaseStore:
+    """
+    Indexed store of track IDs already added to each playlist, with the time they were added.
+
+    Replaces today_releases.txt / yesterday_releases.txt. Membership checks are primary
+    key lookups (O(log n)), inserts are done in bulk in a single transaction and old
+    entries expire with an indexed DELETE instead of rewriting the file, so months of
+    history can be kept for dedup without slowing down startup.
+
+    Dedup is per destination playlist (see routing.py): a track added to one playlist can
+    still be routed to another. `playlist_id` defaults to config.TARGET_PLAYLIST_ID.
+    """
+
+    def __init__(self, path=None, retention_days=None):
+        self.path = path or config.RELEASES_DB
+        self.retention_days = retention_days or config.DEDUP_RETENTION_DAYS
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._migrate_single_playlist_schema()
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS added_tracks (
+                playlist_id TEXT NOT NULL,
+                track_id TEXT NOT NULL,
+                added_at INTEGER NOT NULL,
+                PRIMARY KEY (playlist_id, track_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_added_tracks_added_at ON added_tracks (added_at);
+        """)
+
+    def _migrate_single_playlist_schema(self):
+        """Move a store from before playlist routing (track_id only) to the per-playlist schema."""
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(added_tracks)")]
+        if not columns or 'playlist_id' in columns:
+            return
+
+        with self._conn:
+            self._conn.execute("ALTER TABLE added_tracks RENAME TO added_tracks_single")
+            self._conn.execute("DROP INDEX IF EXISTS idx_added_tracks_added_at")
+            self._conn.execute("""
+                CREATE TABLE added_tracks (
+                    playlist_id TEXT NOT NULL,
+                    track_id TEXT NOT NULL,
+                    added_at INTEGER NOT NULL,
+                    PRIMARY KEY (playlist_id, track_id)
+                ) WITHOUT ROWID
+            """)
+            migrated = self._conn.execute(
+                "INSERT INTO added_tracks (playlist_id, track_id, added_at) "
+                "SELECT ?, track_id, added_at FROM added_tracks_single",
+                (config.TARGET_PLAYLIST_ID,)
+            ).rowcount
+            self._conn.execute("DROP TABLE added_tracks_single")
+        log.info(f"📦 Migrated {migrated} track IDs in {self.path} to per-playlist dedup")
+
+    def contains(self, track_id, playlist_id=None):
+        """Whether the track was already added to the playlist."""
+        playlist_id = playlist_id or config.TARGET_PLAYLIST_ID
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM added_tracks WHERE playlist_id = ? AND track_id = ?", (playlist_id, track_id)
+            ).fetchone()
+        return row is not None
+
+    def __contains__(self, track_id):
+        return self.contains(track_id)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM added_tracks").fetchone()[0]
+
+    def filter_new(self, track_ids, playlist_id=None):
+        """Return the track IDs not yet added to the playlist, keeping their order."""
+        playlist_id = playlist_id or config.TARGET_PLAYLIST_ID
+        track_ids = list(track_ids)
+        known = set()
+        with self._lock:
+            # Stay below SQLite's bound-parameter limit
+            for i in range(0, len(track_ids), 500):
+                chunk = track_ids[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                known.update(row[0] for row in self._conn.execute(
+                    f"SELECT track_id FROM added_tracks WHERE playlist_id = ? AND track_id IN ({placeholders})",
+                    [playlist_id] + chunk
+                ))
+        return [track_id for track_id in track_ids if track_id not in known]
+
+    def add_many(self, track_ids, added_at=None, playlist_id=None):
+        """Record track IDs as added to the playlist in one transaction; IDs already present keep their time."""
+        added_at = int(added_at if added_at is not None else time.time())
+        playlist_id = playlist_id or config.TARGET_PLAYLIST_ID
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO added_tracks (playlist_id, track_id, added_at) VALUES (?, ?, ?)",
+                ((playlist_id, track_id, added_at) for track_id in track_ids)
+            )
+
+    def expire(self):
+        """Delete entries older than the retention window. Returns how many were removed."""
+        cutoff = int(time.time()) - self.retention_days * SECONDS_PER_DAY
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM added_tracks WHERE added_at < ?", (cutoff,))
+        return cursor.rowcount
+
+    def import_legacy_files(self, legacy_files=(('today_releases.txt', 0), ('yesterday_releases.txt', 1))):
+        """
+        One-time migration from the old text tracking files.
+        Each file is imported with its age in days, then removed.
+        """
+        for path, days_old in legacy_files:
+            try:
+                with open(path, 'r') as f:
+                    track_ids = [line.strip() for line in f if line.strip()]
+            except FileNotFoundError:
+                continue
+
+            self.add_many(track_ids, added_at=time.time() - days_old * SECONDS_PER_DAY)
+            os.remove(path)
+            log.info(f"📦 Migrated {len(track_ids)} track IDs from {path} into {self.path}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,347 @@
+import os
+import re
+import json
+import time
+import zlib
+import hashlib
+import sqlite3
+import logging
+import tempfile
+import threading
+from http import HTTPStatus
+from datetime import datetime
+from urllib.parse import urlparse, parse_qsl, urlencode
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+import config
+
+log = logging.getLogger(__name__)
+
+MODES = ('off', 'cache', 'record', 'replay')
+
+# Endpoint of a Spotify API path, for per-endpoint TTLs (first match wins)
+_ENDPOINTS = [
+    ('album_tracks', re.compile(r'/albums/[^/]+/tracks$')),
+    ('albums', re.compile(r'/albums/?$')),
+    ('artist_albums', re.compile(r'/artists/[^/]+/albums$')),
+    ('playlist_items', re.compile(r'/playlists/[^/]+/(tracks|items)$')),
+    ('playlist', re.compile(r'/playlists/[^/]+$')),
+    ('new_releases', re.compile(r'/browse/new-releases$')),
+    ('search', re.compile(r'/search$')),
+]
+
+# Not stored with a response: they describe the original transfer, not the content
+_DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+# State a run starts from (config attributes naming the files), kept with a recording
+STATE_FILES = ('ARTIST_CACHE_FILE', 'DEFERRED_ARTISTS_FILE', 'RELEASES_DB')
+
+_thread_state = threading.local()
+
+def network_sends():
+    """
+    Requests the calling thread has sent past the cache. Compare before and after a
+    Spotify call to tell whether it was answered from the cache alone.
+    """
+    return getattr(_thread_state, 'sends', 0)
+
+def endpoint_of(url):
+    path = urlparse(url).path
+    for name, pattern in _ENDPOINTS:
+        if pattern.search(path):
+            return name
+    return None
+
+def is_token_request(request):
+    return request.url.split('?', 1)[0] == config.SPOTIFY_TOKEN_URL
+
+def cache_key(method, url):
+    """Method and URL with the query parameters sorted; auth headers are not part of the key."""
+    parsed = urlparse(url)
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return f"{method} {parsed.scheme}://{parsed.netloc}{parsed.path}?{query}"
+
+class ResponseCache:
+    """
+    On-disk cache of Spotify API responses in SQLite, bodies compressed with zlib.
+
+    Modes (config.SPOTIFY_CACHE_MODE):
+        cache:  successful GETs are kept for their endpoint's TTL (config.RESPONSE_CACHE_TTLS;
+                endpoints without a TTL are not cached), least recently used entries are
+                evicted above config.RESPONSE_CACHE_MAX_MB
+        record: every request goes to the network, and its response, POSTs included, is
+                captured (replacing an earlier one) with no expiry and no eviction
+        replay: every request is answered from a recording and never reaches the network,
+                so a captured run can be replayed offline and profiled deterministically
+
+    POSTs are matched on their body as well as their URL. Token requests are never stored,
+    so a recording holds no live credentials; a replay answers them with a made-up token.
+
+    A recording also keeps what the run started from: its `now` (see run_now) and the
+    state files in STATE_FILES. A replay restores those into a scratch directory (see
+    restore_state), so it sees the same schedule and dedup state and leaves the live
+    files, shared token caches included, alone.
+    """
+
+    def __init__(self, path=None, mode=None, ttls=None, max_bytes=None):
+        self.path = path or config.RESPONSE_CACHE_FILE
+        self.mode = mode or config.SPOTIFY_CACHE_MODE
+        self.ttls = ttls if ttls is not None else config.RESPONSE_CACHE_TTLS
+        self.max_bytes = max_bytes or config.RESPONSE_CACHE_MAX_MB * 1024 * 1024
+        if self.mode not in MODES:
+            raise ValueError(f"Invalid SPOTIFY_CACHE_MODE '{self.mode}', expected one of {', '.join(MODES)}")
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at INTEGER,
+                accessed_at INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses (accessed_at);
+            CREATE TABLE IF NOT EXISTS run_state (
+                name TEXT PRIMARY KEY,
+                value BLOB NOT NULL
+            ) WITHOUT ROWID;
+        """)
+        if self.mode == 'cache':
+            with self._conn:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at < ?", (int(time.time()),)
+                )
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.evicted = 0
+
+    def _key_for(self, request):
+        key = cache_key(request.method, request.url)
+        if request.method == 'GET':
+            return key
+        # POSTs (playlist adds) are only recorded/replayed; each body is a different call
+        body = request.body or b''
+        if isinstance(body, str):
+            body = body.encode()
+        return f"{key} {hashlib.sha256(body).hexdigest()[:16]}"
+
+    def lookup(self, request):
+        """Return (status, headers, body) for a request, or None."""
+        if self.mode in ('off', 'record') or (self.mode == 'cache' and request.method != 'GET'):
+            return None
+
+        key = self._key_for(request)
+        now = int(time.time())
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body, expires_at, accessed_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.mode == 'cache' and row[3] is not None and row[3] < now):
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            if now - row[4] >= 60:
+                # Recency is only needed at minute precision, which saves a write per hit
+                with self._conn:
+                    self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        status, headers, body, _, _ = row
+        return status, json.loads(headers), zlib.decompress(body)
+
+    def store(self, request, response):
+        """Keep a response according to the mode and its endpoint's TTL."""
+        if is_token_request(request):
+            return
+        if self.mode == 'record':
+            if response.status_code == 429 or response.status_code >= 500:
+                # A replayed 429 would be retried forever; the retry's response is recorded instead
+                return
+            expires_at = None
+        elif self.mode == 'cache' and request.method == 'GET' and response.status_code == 200:
+            ttl = self.ttls.get(endpoint_of(request.url))
+            if not ttl:
+                return
+            expires_at = int(time.time()) + ttl
+        else:
+            return
+
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS}
+        body = zlib.compress(response.content or b'', 6)
+        headers_json = json.dumps(headers, separators=(',', ':'))
+        size = len(body) + len(headers_json)
+        key = self._key_for(request)
+
+        with self._lock:
+            with self._conn:
+                old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, status, headers, body, size, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, response.status_code, headers_json, body, size, expires_at, int(time.time()))
+                )
+            self._size += size - (old[0] if old else 0)
+            self.stored += 1
+            if self.mode == 'cache' and self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries down to 90% of the size cap (called with the lock held)."""
+        target = self.max_bytes * 0.9
+        keys = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if self._size <= target:
+                break
+            keys.append(key)
+            self._size -= size
+
+        with self._conn:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                self._conn.execute(f"DELETE FROM responses WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+        self.evicted += len(keys)
+
+    def _set_state(self, name, value):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO run_state (name, value) VALUES (?, ?)", (name, value))
+
+    def _get_state(self, name):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM run_state WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def snapshot_state(self):
+        """Store the state files the run starts from in the recording (record mode)."""
+        for name in STATE_FILES:
+            path = getattr(config, name)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    self._set_state(f"file:{name}", f.read())
+
+    def restore_state(self, directory=None):
+        """
+        Write the recorded state files to `directory` (default: a new temporary directory)
+        and point config at them, so the replayed run starts where the recorded one did and
+        its writes never touch the live files. Returns the directory.
+        """
+        directory = directory or tempfile.mkdtemp(prefix='spotify-replay-')
+        for name in STATE_FILES:
+            path = os.path.join(directory, os.path.basename(getattr(config, name)))
+            content = self._get_state(f"file:{name}")
+            if content is not None:
+                with open(path, 'wb') as f:
+                    f.write(content)
+            setattr(config, name, path)
+        # Replayed tokens are made up: keep them out of the token cache files live runs share
+        config.TOKEN_CACHE_DIR = os.path.join(directory, 'tokens')
+        return directory
+
+    def run_now(self, now):
+        """
+        The `now` a run scans with: stored with a recording, and read back on replay, so
+        release windows and the schedule match the recorded run whatever day it is replayed.
+        """
+        if self.mode == 'record':
+            self._set_state('now', now.isoformat().encode())
+        elif self.mode == 'replay':
+            recorded = self._get_state('now')
+            if recorded is not None:
+                return datetime.fromisoformat(recorded.decode())
+            log.warning("⚠️ The recording has no start time, replaying with the current time")
+        return now
+
+    def stats(self):
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stored': self.stored,
+                'evicted': self.evicted,
+                'size_mb': round(self._size / 1024 / 1024, 1),
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class CachingAdapter(HTTPAdapter):
+    """
+    Transport adapter that serves Spotify requests from the ResponseCache.
+    Mounted by auth_setup.build_session, so it sits under spotipy and the conditional
+    artist-albums requests alike.
+    """
+
+    def __init__(self, cache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request, **kwargs):
+        if self.cache.mode == 'replay' and is_token_request(request):
+            return self._cached_response(
+                request, 200, {'Content-Type': 'application/json'},
+                json.dumps({'access_token': 'replay-token', 'token_type': 'Bearer', 'expires_in': 3600}).encode()
+            )
+
+        cached = self.cache.lookup(request)
+        if cached is not None:
+            return self._cached_response(request, *cached)
+
+        if self.cache.mode == 'replay':
+            log.warning(f"⚠️ Not in the recording, answering 404: {request.method} {request.url}")
+            return self._cached_response(
+                request, 404, {'Content-Type': 'application/json'},
+                json.dumps({'error': {'status': 404, 'message': 'Not in the recording'}}).encode()
+            )
+
+        _thread_state.sends = network_sends() + 1
+        response = super().send(request, **kwargs)
+        self.cache.store(request, response)
+        return response
+
+    def _cached_response(self, request, status, headers, body):
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response.headers['X-Cache'] = 'HIT'
+        response._content = body
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.reason = HTTPStatus(status).phrase
+        return response
+
+
+# Global instance for easy access
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """
+    Returns the process-wide ResponseCache, or None when caching is off.
+    Safe to call multiple times - will reuse the same cache instance.
+    Creating it snapshots (record) or restores (replay) the run's state files, so it has
+    to happen before anything loads them; main() does it first thing.
+    """
+    global _response_cache
+
+    if config.SPOTIFY_CACHE_MODE == 'off':
+        return None
+
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+            log.info(f"🗄️ Response cache: {_response_cache.mode} mode ({_response_cache.path})")
+            if _response_cache.mode == 'record':
+                _response_cache.snapshot_state()
+            elif _response_cache.mode == 'replay':
+                directory = _response_cache.restore_state()
+                log.info(f"🗄️ Replaying from the recorded state in {directory}")
+
+    return _response_cache
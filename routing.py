@@ -0,0 +1,87 @@
+import logging
+import config
+
+log = logging.getLogger(__name__)
+
+def _load_artist_set(artists):
+    """A route's artists: a list of IDs, or the path of a file of comma-separated IDs (like artists_id.txt)."""
+    if isinstance(artists, str):
+        with open(artists, 'r') as f:
+            return {x.strip() for x in f.read().split(',') if x.strip()}
+    return set(artists)
+
+class Route:
+    """
+    One destination playlist and the conditions a track must meet to be added to it.
+    Unset conditions match everything; a route with no conditions gets every track.
+
+    Args:
+        playlist_id: Destination playlist
+        name: Label for the logs (default: the playlist ID)
+        artists: Only tracks by one of these artists (list of IDs or path to an ID file)
+        album_types: Only tracks from these release types, e.g. ['single'] or ['album', 'compilation']
+        min_duration_ms / max_duration_ms: Only tracks within this length
+        explicit: Only explicit (True) or only clean (False) tracks
+    """
+
+    def __init__(self, playlist_id, name=None, artists=None, album_types=None,
+                 min_duration_ms=None, max_duration_ms=None, explicit=None):
+        self.playlist_id = playlist_id
+        self.name = name or playlist_id
+        self.artist_ids = _load_artist_set(artists) if artists is not None else None
+        self.album_types = set(album_types) if album_types is not None else None
+        self.min_duration_ms = min_duration_ms
+        self.max_duration_ms = max_duration_ms
+        self.explicit = explicit
+
+    def matches(self, entry):
+        """Whether a track entry (see check_new_releases.track_entry) goes to this playlist."""
+        if self.artist_ids is not None and self.artist_ids.isdisjoint(entry['artist_ids']):
+            return False
+        if self.album_types is not None and entry['album_type'] not in self.album_types:
+            return False
+        if self.min_duration_ms is not None and entry['duration_ms'] < self.min_duration_ms:
+            return False
+        if self.max_duration_ms is not None and entry['duration_ms'] > self.max_duration_ms:
+            return False
+        if self.explicit is not None and entry['explicit'] != self.explicit:
+            return False
+        return True
+
+class Router:
+    """
+    Maps every new track to the playlists it belongs in, so a single scan feeds all of them.
+
+    The main playlist (config.TARGET_PLAYLIST_ID) gets every track; config.PLAYLIST_ROUTES
+    adds more destinations, each with its own conditions (see Route). A track can match
+    several routes; routes to the same playlist are combined.
+    """
+
+    def __init__(self, routes=None):
+        if routes is None:
+            routes = [Route(config.TARGET_PLAYLIST_ID, name='main')]
+            routes += [Route(**route) for route in config.PLAYLIST_ROUTES]
+        self.routes = routes
+        self.playlist_ids = list(dict.fromkeys(route.playlist_id for route in routes))
+
+        if len(self.playlist_ids) > 1:
+            names = ', '.join(route.name for route in routes)
+            log.info(f"🧭 Routing new tracks to {len(self.playlist_ids)} playlists ({names})")
+
+    def destinations(self, entry):
+        """Playlist IDs the track is routed to, in route order."""
+        return list(dict.fromkeys(route.playlist_id for route in self.routes if route.matches(entry)))
+
+def unseen_destinations(track_id, playlist_ids, seen_tracks, release_store):
+    """
+    Keep the playlists the track was neither routed to earlier in this run nor added to
+    before, and mark them as seen. `seen_tracks` maps each playlist ID to the set of
+    track IDs routed to it (a defaultdict of sets).
+    """
+    new = [
+        playlist_id for playlist_id in playlist_ids
+        if track_id not in seen_tracks[playlist_id] and not release_store.contains(track_id, playlist_id)
+    ]
+    for playlist_id in new:
+        seen_tracks[playlist_id].add(track_id)
+    return new
@@ -0,0 +1,93 @@
+import os
+import glob
+import json
+import hashlib
+import logging
+import config
+
+log = logging.getLogger(__name__)
+
+def parse_shard(value):
+    """Parse a '--shard i/N' value (0-based index) into (index, count)."""
+    try:
+        index, count = (int(x) for x in value.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{value}', expected i/N (e.g. 0/4)")
+
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{value}', index must be in 0..N-1")
+    return index, count
+
+def shard_of(artist_id, count):
+    """Deterministic shard for an artist ID (stable across processes, runners and Python versions)."""
+    return int(hashlib.md5(artist_id.encode()).hexdigest(), 16) % count
+
+def shard_artist_ids(artist_ids, index, count):
+    """Artists belonging to shard `index` of `count`, in their original order."""
+    return [artist_id for artist_id in artist_ids if shard_of(artist_id, count) == index]
+
+def shard_name(index, count):
+    return f"shard-{index}-of-{count}"
+
+def partial_results_path(index, count):
+    return os.path.join(config.PARTIALS_DIR, f"{shard_name(index, count)}.jsonl")
+
+def partial_cache_path(index, count):
+    return os.path.join(config.PARTIALS_DIR, f"{shard_name(index, count)}.artist_cache.json")
+
+def partial_deferred_path(index, count):
+    return os.path.join(config.PARTIALS_DIR, f"{shard_name(index, count)}.deferred.json")
+
+def shard_checkpoint_path(index, count):
+    root, ext = os.path.splitext(config.SCAN_CHECKPOINT_FILE)
+    return f"{root}.{shard_name(index, count)}{ext}"
+
+class PartialFileSink:
+    """
+    TrackWriter sink for a shard: appends each batch of new tracks to the shard's
+    partial results file (one JSON object per line), so a shard's progress is durable
+    and can be resumed. A fresh (non-resumed) scan starts the file over.
+    """
+
+    def __init__(self, index, count, append=False):
+        os.makedirs(config.PARTIALS_DIR, exist_ok=True)
+        self.path = partial_results_path(index, count)
+        self._file = open(self.path, 'a' if append else 'w')
+
+    def write(self, entries):
+        for entry in entries:
+            self._file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+        log.info(f"💾 Shard results written to {self.path}")
+
+def load_partial_results():
+    """
+    Load every shard's partial results, ordered by shard index so the merge is deterministic.
+    Warns if shards are missing, so an incomplete merge is visible in the logs.
+    """
+    partials = []
+    for path in glob.glob(os.path.join(config.PARTIALS_DIR, 'shard-*-of-*.jsonl')):
+        index, count = (int(x) for x in os.path.basename(path)[len('shard-'):-len('.jsonl')].split('-of-'))
+        with open(path, 'r') as f:
+            tracks = [json.loads(line) for line in f if line.strip()]
+        partials.append({'shard': index, 'shard_count': count, 'path': path, 'tracks': tracks})
+
+    partials.sort(key=lambda p: p['shard'])
+
+    if partials:
+        count = partials[0]['shard_count']
+        missing = sorted(set(range(count)) - {p['shard'] for p in partials})
+        if missing:
+            log.warning(f"⚠️ Missing partial results for shards {missing} of {count}")
+
+    return partials
+
+def partial_cache_paths():
+    return sorted(glob.glob(os.path.join(config.PARTIALS_DIR, 'shard-*-of-*.artist_cache.json')))
+
+def partial_deferred_paths():
+    return sorted(glob.glob(os.path.join(config.PARTIALS_DIR, 'shard-*-of-*.deferred.json')))
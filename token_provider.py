@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import config
+from metrics import get_metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, each process refreshes on its own
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+def token_cache_path(label, secret=None):
+    """
+    Cache file shared by every process using the same token, e.g. a read app's client ID.
+    A `secret` the token is issued for (the user's refresh token) is part of the name as a
+    hash, so another account or a rotated refresh token never picks up a cached token.
+    """
+    if secret:
+        label = f"{label}-{hashlib.sha256(secret.encode()).hexdigest()[:16]}"
+    return os.path.join(config.TOKEN_CACHE_DIR, f"{label}.json")
+
+class TokenProvider:
+    """
+    Keeps a Spotify access token fresh for every thread and process that uses it.
+
+    - A background thread refreshes the token `refresh_margin` seconds before it expires
+      (at most half its lifetime, never more often than every MIN_REFRESH_SECONDS), so
+      calls never run into an expired token, however long a batch takes.
+    - Readers get the current token without taking a lock: it is an immutable
+      (access_token, expires_at) tuple that a refresh replaces in one assignment.
+    - The token is shared between processes through a cache file. Refreshes hold an
+      exclusive flock on it and first look whether another process already refreshed,
+      so parallel scanners (shards) make one token request instead of one each.
+    - refresh(stale_token) is single-flight: when many calls get a 401 at once, the first
+      refreshes and the others wait for it and then use the new token.
+
+    Also works as a spotipy auth_manager (get_access_token), so clients built on it pick
+    up every new token on their next request.
+
+    Args:
+        request_token: Function that requests a new token from Spotify and returns spotipy's
+            token_info dict (access_token, expires_in and/or expires_at)
+        cache_path: Shared token cache file (default: no sharing between processes)
+        name: Label for the logs
+        refresh_margin: Seconds before expiry to refresh (default: config.TOKEN_REFRESH_MARGIN_SECONDS),
+            at most half the token's lifetime, so short-lived tokens are still used for a while
+    """
+
+    RETRY_SECONDS = 30
+    MIN_REFRESH_SECONDS = 5  # floor between background refreshes, even for tokens that arrive expired
+
+    def __init__(self, request_token, cache_path=None, name='token', refresh_margin=None):
+        self._request_token = request_token
+        self.cache_path = cache_path
+        self.name = name
+        self.refresh_margin = refresh_margin if refresh_margin is not None else config.TOKEN_REFRESH_MARGIN_SECONDS
+        self._current = None  # (access_token, expires_at, refresh_at)
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.refreshes = 0
+        self.cache_hits = 0
+
+    @property
+    def token(self):
+        """The current access token, without refreshing."""
+        current = self._current
+        return current[0] if current else None
+
+    @property
+    def expires_at(self):
+        current = self._current
+        return current[1] if current else 0.0
+
+    def get_access_token(self, as_dict=False):
+        """
+        The current access token; refreshes synchronously only when there is none yet or it has
+        expired (the background thread failed to keep up). Signature matches spotipy's auth managers.
+        """
+        current = self._current
+        if current is None or time.time() >= current[1]:
+            self.refresh(stale_token=current[0] if current else None)
+            current = self._current
+        if as_dict:
+            return {'access_token': current[0], 'expires_at': int(current[1])}
+        return current[0]
+
+    def _token_state(self, access_token, expires_at):
+        """(access_token, expires_at, refresh_at), refreshing `refresh_margin` early but not before half the lifetime."""
+        lifetime = max(expires_at - time.time(), 0.0)
+        return access_token, expires_at, expires_at - min(self.refresh_margin, lifetime / 2)
+
+    def _fresh(self, current):
+        return current[2] > time.time()
+
+    def refresh(self, stale_token=None):
+        """
+        Make sure the token is newer than `stale_token` (the one a call was rejected with)
+        and return it. Callers arriving while a refresh is running wait for it and reuse its
+        result; without `stale_token` a token is only requested if the current one is due.
+        """
+        with self._refresh_lock:
+            current = self._current
+            if current is not None and current[0] != stale_token and self._fresh(current):
+                # Someone else refreshed while this caller was waiting
+                return current[0]
+
+            with self._cache_lock():
+                cached = self._read_cache()
+                if cached is not None and cached[0] != stale_token and self._fresh(cached):
+                    self.cache_hits += 1
+                    log.info(f"🔑 Using the {self.name} access token refreshed by another process")
+                    self._current = cached
+                    return cached[0]
+
+                token_info = self._request_token()
+                expires_at = token_info.get('expires_at') or time.time() + token_info.get('expires_in', 3600)
+                self._current = self._token_state(token_info['access_token'], float(expires_at))
+                self._write_cache(self._current)
+
+            self.refreshes += 1
+            get_metrics().record_token_refresh()
+            log.info(f"✅ Spotify {self.name} access token refreshed successfully")
+            return self._current[0]
+
+    def _cache_lock(self):
+        return _FileLock(self.cache_path + '.lock' if self.cache_path and fcntl else None)
+
+    def _read_cache(self):
+        if not self.cache_path:
+            return None
+        try:
+            with open(self.cache_path, 'r') as f:
+                data = json.load(f)
+            current = self._token_state(data['access_token'], float(data['expires_at']))
+            return current[:2] + (float(data.get('refresh_at', current[2])),)
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_cache(self, current):
+        if not self.cache_path:
+            return
+        tmp_path = self.cache_path + '.tmp'
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'access_token': current[0], 'expires_at': current[1], 'refresh_at': current[2]}, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def start(self):
+        """Get a token (from the cache file if another process has a fresh one) and start refreshing in the background."""
+        if self.cache_path:
+            os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        self.refresh()
+        self._thread = threading.Thread(target=self._run, name=f"token-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while True:
+            current = self._current
+            wait = current[2] - time.time() if current else 0.0
+            if self._stop.wait(max(wait, self.MIN_REFRESH_SECONDS)):
+                return
+            try:
+                self.refresh()
+            except Exception as e:
+                # The current token may still be valid for a while; callers refresh themselves once it is not
+                log.warning(f"⚠️ Background refresh of the {self.name} token failed ({e}), "
+                            f"retrying in {self.RETRY_SECONDS}s")
+                if self._stop.wait(self.RETRY_SECONDS):
+                    return
+
+class _FileLock:
+    """Exclusive flock on a lock file for the duration of a with-block (no-op without a path)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        if self.path:
+            self._file = open(self.path, 'a')
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
@@ -0,0 +1,184 @@
+import os
+import time
+import heapq
+import signal
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+import config
+from auth_setup import get_spotify_manager
+from artist_cache import ArtistCache
+from release_scheduler import polling_interval, window_start_for
+from routing import Router
+from pipeline import TrackWriter
+from check_new_releases import (
+    AlbumTrackCache, NotifyingPlaylistSink, scan_artists, write_new_tracks, load_artist_ids, revert_unfetched_artists,
+    open_release_store, expire_release_store
+)
+
+log = logging.getLogger(__name__)
+
+class WatchDaemon:
+    """
+    Long-running poller: instead of checking every artist once a day, artists are kept
+    in a priority queue keyed by when they are next due and polled continuously at a
+    steady `poll_rate` (artists per second), so a release is picked up within one
+    cycle and the API load is spread over the day instead of one spike.
+
+    An artist's next poll is its polling interval (see release_scheduler.polling_interval,
+    in days) scaled down to `cycle_seconds`: active artists are polled every cycle,
+    dormant ones every few cycles. New tracks go through the usual routing, dedup and
+    streaming writer, which adds them to the playlists and posts them to Discord.
+
+    State is the artist cache (next due times come from its check times) and the release
+    store; the cache is saved every config.WATCH_SAVE_SECONDS and on shutdown. SIGTERM and
+    SIGINT finish the current round, write pending tracks and save before exiting.
+    """
+
+    def __init__(self, poll_rate=None, cycle_seconds=None, max_workers=None, round_seconds=10):
+        self.poll_rate = poll_rate or config.WATCH_POLL_RATE
+        self.cycle_seconds = cycle_seconds or config.WATCH_CYCLE_SECONDS
+        self.max_workers = max_workers or config.WATCH_WORKERS
+        self.round_seconds = round_seconds
+        self._stop = threading.Event()
+
+        self.artist_cache = ArtistCache().load()
+        self.artist_ids = set()
+        self._artists_mtime = None
+        self._queue = []  # (due_at, artist_id)
+
+        self.polls = 0
+        self.tracks_found = 0
+
+    def stop(self, signum=None, frame=None):
+        if not self._stop.is_set():
+            log.info("🛑 Shutdown requested, finishing the current round...")
+        self._stop.set()
+
+    def _next_due(self, artist_id):
+        """Wall-clock time of the artist's next poll; never-checked artists are due now."""
+        entry = self.artist_cache.get(artist_id)
+        checked_at = (entry or {}).get('checked_at')
+        if checked_at is None:
+            return time.time()
+        today = datetime.now(timezone.utc).date()
+        return checked_at + polling_interval(entry, today) * self.cycle_seconds
+
+    def _reload_artists(self):
+        """(Re)load artists_id.txt when it changed; new artists are queued, removed ones dropped."""
+        try:
+            mtime = os.path.getmtime(config.ARTISTS_FILE)
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._artists_mtime:
+            return
+        self._artists_mtime = mtime
+
+        artist_ids = set(load_artist_ids())
+        if not artist_ids:
+            # Missing, or caught mid-rewrite by extract_artists: keep watching the current list
+            # rather than dropping every artist (and their cache entries) until the next reload
+            log.warning(f"⚠️ {config.ARTISTS_FILE} is missing or empty, keeping the current {len(self.artist_ids)} artists")
+            self._artists_mtime = None
+            return
+        added = artist_ids - self.artist_ids
+        for artist_id in added:
+            heapq.heappush(self._queue, (self._next_due(artist_id), artist_id))
+        # Removed artists are skipped when they come up in the queue
+        self.artist_ids = artist_ids
+        self.artist_cache.prune(artist_ids)
+        log.info(f"👀 Watching {len(artist_ids)} artists ({len(added)} added)")
+
+    def _pop_due(self, limit):
+        """Up to `limit` due artists, most overdue first."""
+        due = []
+        now = time.time()
+        while self._queue and len(due) < limit and self._queue[0][0] <= now:
+            _, artist_id = heapq.heappop(self._queue)
+            if artist_id in self.artist_ids:
+                due.append(artist_id)
+        return due
+
+    def _poll(self, artist_ids, router, seen_tracks, release_store, writer):
+        """Scan due artists, queue their new tracks and put them back in the queue."""
+        now = datetime.now(timezone.utc)
+        window_starts = {a: window_start_for(self.artist_cache.get(a), now) for a in artist_ids}
+        artist_releases = scan_artists(
+            artist_ids, min(window_starts.values()), now, max_workers=self.max_workers,
+            artist_cache=self.artist_cache, window_starts=window_starts
+        )
+
+        # Albums are only looked up for this round, so memory does not grow with uptime
+        album_tracks = AlbumTrackCache()
+        album_tracks.fetch(
+            [album['id'] for releases in artist_releases for album, _ in releases],
+            max_workers=self.max_workers
+        )
+        revert_unfetched_artists(artist_ids, artist_releases, album_tracks, self.artist_cache)
+        self.tracks_found += write_new_tracks(
+            [release for releases in artist_releases for release in releases],
+            album_tracks, router, seen_tracks, release_store, writer, now
+        )
+
+        for artist_id in artist_ids:
+            # Failed polls are not recorded in the cache; retry them after a minute rather than right away
+            due_at = max(self._next_due(artist_id), time.time() + 60)
+            heapq.heappush(self._queue, (due_at, artist_id))
+        self.polls += len(artist_ids)
+
+    def run(self):
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self.stop)
+
+        self._reload_artists()
+        release_store = open_release_store()
+        router = Router()
+        sink = NotifyingPlaylistSink(get_spotify_manager(), release_store)
+        # The sink notifies every batch, so written tracks are not kept for the daemon's lifetime
+        writer = TrackWriter(sink, flush_interval=config.WRITER_FLUSH_SECONDS).start()
+        seen_tracks = defaultdict(set)
+
+        log.info(f"👀 Watch mode: {self.poll_rate} artists/s, cycle {self.cycle_seconds / 3600:.1f}h, "
+                 f"{self.max_workers} workers")
+        last_save = time.monotonic()
+        last_expire_day = None
+
+        try:
+            while not self._stop.is_set():
+                round_start = time.monotonic()
+                due = self._pop_due(max(1, int(self.poll_rate * self.round_seconds)))
+
+                if due:
+                    self._poll(due, router, seen_tracks, release_store, writer)
+                    # Keep a steady pace: a round of N artists takes at least N / poll_rate seconds
+                    pause = len(due) / self.poll_rate - (time.monotonic() - round_start)
+                else:
+                    next_due = self._queue[0][0] - time.time() if self._queue else self.round_seconds
+                    pause = min(next_due, self.round_seconds)
+
+                if pause > 0:
+                    self._stop.wait(pause)
+
+                if time.monotonic() - last_save >= config.WATCH_SAVE_SECONDS:
+                    # Written tracks are in the release store, so the in-run dedup set can start over
+                    writer.flush()
+                    seen_tracks.clear()
+                    self.artist_cache.save()
+                    self._reload_artists()
+                    log.info(f"💾 Watch state saved: {self.polls} polls, {self.tracks_found} new tracks so far")
+                    last_save = time.monotonic()
+
+                today = datetime.now(timezone.utc).date()
+                if today != last_expire_day:
+                    expire_release_store(release_store)
+                    last_expire_day = today
+        finally:
+            writer.close()
+            sink.close()
+            self.artist_cache.save()
+            release_store.close()
+            log.info(f"👋 Watch mode stopped after {self.polls} polls, {self.tracks_found} new tracks")
+
+def run_watch_daemon():
+    WatchDaemon().run()